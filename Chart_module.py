@@ -0,0 +1,305 @@
+import math
+from bisect import bisect_right
+from functools import lru_cache
+
+# --- 圓餅圖樣式 (Pie chart style)：互動視窗與 Report_module 共用 ---
+# matplotlib 只在真正繪圖時才匯入，本模組可以在啟動初期就載入
+CUSTOM_COLORS = [
+    '#F48FB1', '#CE93D8', '#9FA8DA', '#90CAF9', '#A5D6A7', 
+    '#FFF59D', '#FFCC80', '#EF9A9A', '#BCAAA4'
+]
+OTHER_COLOR = '#CFD8DC'
+FONT_FAMILY = ['Microsoft JhengHei', 'Arial Unicode MS', 'SimHei']
+CHART_TITLE = '支出圓餅圖'
+# ax.pie 的版面參數；PieChart 原地更新時以相同公式重算扇形角度與文字位置
+START_ANGLE = 140
+LABEL_DISTANCE = 1.1
+PCT_DISTANCE = 0.8
+PCT_FORMAT = '%1.1f%%'
+
+
+class WedgeHitTester:
+    """
+    以幾何方式判斷滑鼠落在哪個扇形：
+    把游標換算成相對圓心的極座標 (角度, 半徑)，再用預先計算好的扇形起始角度做二分搜尋，
+    每次查詢 O(log n)，不必對每個扇形呼叫 wedge.contains()。
+    """
+
+    def __init__(self, wedges=()):
+        self.set_wedges(wedges)
+
+    def set_wedges(self, wedges):
+        self._starts = []
+        self._ends = []
+        self._center = (0.0, 0.0)
+        self._radius = 0.0
+        self._origin = 0.0
+        if not wedges:
+            return
+        first = wedges[0]
+        self._center = tuple(first.center)
+        self._radius = first.r
+        self._origin = first.theta1
+        # 角度一律換算成「相對第一個扇形起點」的 [0, 360) 範圍，pie 的扇形依逆時針遞增
+        for wedge in wedges:
+            self._starts.append(wedge.theta1 - self._origin)
+            self._ends.append(wedge.theta2 - self._origin)
+
+    def hit(self, x, y):
+        """回傳 (x, y) (資料座標) 所在扇形的索引，不在任何扇形內時回傳 -1。"""
+        if not self._starts or x is None or y is None:
+            return -1
+        dx, dy = x - self._center[0], y - self._center[1]
+        if dx * dx + dy * dy > self._radius * self._radius:
+            return -1
+        angle = (math.degrees(math.atan2(dy, dx)) - self._origin) % 360.0
+        index = bisect_right(self._starts, angle) - 1
+        if index < 0 or angle > self._ends[index]:
+            return -1
+        return index
+
+    def hit_event(self, event, ax):
+        if event.inaxes != ax:
+            return -1
+        return self.hit(event.xdata, event.ydata)
+
+
+class BlitHighlighter:
+    """
+    以 blitting 重畫圓餅圖的扇形與文字：
+    完整重繪時先快取不含扇形的背景 (扇形設為 animated)，
+    懸停變化時只還原背景並重畫這些 artist，不重新渲染整張圖 (標題、路徑特效等)。
+    後端不支援 blitting 時退回 draw_idle()。
+    """
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.artists = []
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    @property
+    def supported(self):
+        return getattr(self.canvas, 'supports_blit', False)
+
+    def set_artists(self, artists):
+        self.artists = list(artists)
+        if self.supported:
+            for artist in self.artists:
+                artist.set_animated(True)
+        self._background = None
+
+    def _on_draw(self, event):
+        # savefig 存成向量格式 (svg/pdf/eps) 時會暫時換上另一個 canvas 並觸發 draw_event，
+        # 只為互動視窗的 canvas 快取背景
+        if event.canvas is not self.canvas or not self.supported:
+            return
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def update(self):
+        """artist 屬性改變後呼叫：可以 blit 時只重畫 artist，否則請 canvas 找時間完整重繪。"""
+        if not self.supported or self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.fig.bbox)
+
+
+# --- 類別收合 (Top-N collapsing) ---
+OTHER_LABEL = '其他'
+
+
+@lru_cache(maxsize=256)
+def darken_color(hex_color, factor=0.6):
+    """顏色的深色版 (RGB tuple)。結果會被快取，hex_color 需可雜湊 (hex 字串或 RGBA tuple)。"""
+    import matplotlib.colors as mcolors
+    try:
+        rgb = mcolors.hex2color(hex_color)
+        return tuple(x * factor for x in rgb)
+    except:
+        return 'black'
+
+
+@lru_cache(maxsize=256)
+def category_color(index, factor=0.7):
+    """第 index 個扇形顏色的深色版 (hex)，用於明細表格的標題。"""
+    import matplotlib.colors as mcolors
+    return mcolors.to_hex(darken_color(CUSTOM_COLORS[index % len(CUSTOM_COLORS)], factor=factor))
+
+
+class CategoryPalette:
+    """
+    類別 -> 色票索引：類別第一次出現時依序分配，之後固定不變，
+    重新整理、排名變動或鑽取時同一個類別維持同一個顏色 (不取決於字典順序或扇形位置)。
+    """
+
+    def __init__(self, colors=CUSTOM_COLORS):
+        self.colors = colors
+        self._indexes = {}
+
+    def index(self, category):
+        index = self._indexes.get(category)
+        if index is None:
+            index = self._indexes[category] = len(self._indexes)
+        return index
+
+    def color(self, category):
+        return self.colors[self.index(category) % len(self.colors)]
+
+    def pie_colors(self, categories, folded=0):
+        """draw_pie 使用的配色；「其他」扇形固定為 OTHER_COLOR。"""
+        colors = [self.color(category) for category in categories]
+        if folded:
+            colors.append(OTHER_COLOR)
+        return colors
+
+
+def configure_fonts(rc_params):
+    """設定可顯示中文的字型 (傳入 plt.rcParams 或 matplotlib.rcParams)。"""
+    rc_params['font.sans-serif'] = FONT_FAMILY
+    rc_params['axes.unicode_minus'] = False
+
+
+def pie_labels(categories, folded=0):
+    labels = list(categories)
+    if folded:
+        labels.append(f"{OTHER_LABEL} ({folded} 類)")
+    return labels
+
+
+def draw_pie(ax, categories, sizes, folded=0, colors=None):
+    """
+    在 ax 上畫出一層圓餅圖並套用樣式 (配色、深色標籤、百分比描邊)。
+    categories/sizes/folded 同 CategoryRanking.level() 的回傳值，回傳 (wedges, texts, autotexts)。
+    colors 為 None 時依扇形位置取色 (見 CategoryPalette.pie_colors)。
+    """
+    import matplotlib.patheffects as path_effects
+
+    labels = pie_labels(categories, folded)
+    if colors is None:
+        colors = [CUSTOM_COLORS[i % len(CUSTOM_COLORS)] for i in range(len(categories))]
+        if folded:
+            colors.append(OTHER_COLOR)
+
+    is_single = len(sizes) <= 1
+    edge_width = 0 if is_single else 2
+
+    wedges, texts, autotexts = ax.pie(
+        sizes, labels=labels, autopct=PCT_FORMAT, startangle=START_ANGLE,
+        colors=colors, pctdistance=PCT_DISTANCE, labeldistance=LABEL_DISTANCE
+    )
+
+    for i, w in enumerate(wedges):
+        w.set_edgecolor('white')
+        w.set_linewidth(edge_width)
+        face_color = w.get_facecolor()
+        text_color = darken_color(face_color, factor=0.45) 
+        texts[i].set_fontsize(14)        
+        texts[i].set_fontweight('bold')
+        texts[i].set_color(text_color)
+        autotexts[i].set_color('white')
+        autotexts[i].set_fontweight('bold')
+        autotexts[i].set_fontsize(11)
+        autotexts[i].set_path_effects([path_effects.withStroke(linewidth=2, foreground=text_color)])
+    return wedges, texts, autotexts
+
+
+class PieChart:
+    """
+    圓餅圖的渲染快取：以 (標籤, 配色) 為鍵。鍵不變 (只有金額改變) 時直接更新既有扇形的角度、
+    文字位置與百分比，不必 ax.clear() 再重建所有扇形、文字與路徑特效；鍵改變時才完整重畫。
+    """
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.key = None
+        self.artists = ([], [], [])
+
+    def clear(self):
+        self.ax.clear()
+        self.key = None
+        self.artists = ([], [], [])
+
+    def draw(self, categories, sizes, folded=0, colors=None):
+        """畫出一層圓餅圖，回傳 ((wedges, texts, autotexts), rebuilt)；rebuilt 為 False 代表沿用原本的 artist。"""
+        if colors is None:
+            colors = CategoryPalette().pie_colors(categories, folded)
+        key = (tuple(pie_labels(categories, folded)), tuple(colors))
+        if key == self.key:
+            self._update(sizes)
+            return self.artists, False
+        self.clear()
+        self.artists = draw_pie(self.ax, categories, sizes, folded, colors)
+        self.key = key
+        return self.artists, True
+
+    def _update(self, sizes):
+        # 與 ax.pie 相同的公式：逆時針從 START_ANGLE 開始，角度與總和成比例
+        wedges, texts, autotexts = self.artists
+        total = float(sum(sizes))
+        theta1 = START_ANGLE / 360.0
+        for wedge, text, autotext, size in zip(wedges, texts, autotexts, sizes):
+            frac = size / total
+            theta2 = theta1 + frac
+            wedge.set_theta1(360.0 * theta1)
+            wedge.set_theta2(360.0 * theta2)
+            thetam = math.pi * (theta1 + theta2)
+            cos, sin = math.cos(thetam), math.sin(thetam)
+            text.set_position((LABEL_DISTANCE * cos, LABEL_DISTANCE * sin))
+            text.set_horizontalalignment('left' if cos > 0 else 'right')
+            autotext.set_position((PCT_DISTANCE * cos, PCT_DISTANCE * sin))
+            autotext.set_text(PCT_FORMAT % (100.0 * frac))
+            theta1 = theta2
+
+
+def set_chart_title(ax, title):
+    ax.set_title(title, fontsize=18, fontweight='bold', pad=20, color='#555')
+    ax.axis('equal') 
+
+
+def draw_empty(ax, message):
+    ax.text(0.5, 0.5, message, ha='center', va='center', fontsize=14, color='gray')
+
+
+class CategoryRanking:
+    """
+    類別總計的預先彙總：資料變動時排序一次並計算後綴和，
+    之後每一層圓餅圖 (前 N 名 + 「其他」) 都只是切片，鑽取進出不必重新掃描帳本。
+    """
+
+    def __init__(self, totals):
+        self.totals = totals
+        self.ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+        # suffix[i] = ranked[i:] 的金額總和
+        self.suffix = [0.0] * (len(self.ranked) + 1)
+        for i in range(len(self.ranked) - 1, -1, -1):
+            self.suffix[i] = self.suffix[i + 1] + self.ranked[i][1]
+
+    def __len__(self):
+        return len(self.ranked)
+
+    def level(self, offset, top_n):
+        """
+        回傳 (categories, sizes, folded)：
+        offset 為本層從第幾名開始，folded 為被收進「其他」的類別數 (0 代表本層沒有「其他」扇形)。
+        """
+        if offset == 0 and len(self.ranked) <= top_n + 1:
+            # 類別不多時不收合，維持原本的 (首次出現) 順序
+            return list(self.totals.keys()), list(self.totals.values()), 0
+        level = self.ranked[offset:]
+        if len(level) <= top_n + 1:
+            shown, folded = level, 0
+        else:
+            shown, folded = level[:top_n], len(level) - top_n
+        categories = [category for category, _ in shown]
+        sizes = [total for _, total in shown]
+        if folded:
+            sizes.append(self.suffix[offset + top_n])
+        return categories, sizes, folded
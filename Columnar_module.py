@@ -0,0 +1,416 @@
+"""
+欄式二進位帳本 (Columnar ledger)。
+
+expenses.ledger/ 目錄內每個欄位一個檔案 (本機位元組順序)：
+    dates.i4        int32   日期序數 (date.toordinal，無法解析為 0，原文記在 odd_dates.txt)
+    categories.u4   uint32  類別代碼，對應 categories.txt 的行號
+    amounts.f8      float64 金額
+    notes.idx       uint64  每筆備註在 notes.bin 中的結束位置
+    notes.bin               所有備註的 UTF-8 內容
+    categories.txt          類別字典，每行一個 JSON 字串
+    odd_dates.txt           無法由日期序數還原的日期原文 (例如 bad date)，每行一個 JSON [列號, 原文]
+
+追加時 amounts.f8 最後寫入，因此列數以各欄位中最短者為準；
+寫到一半中斷的欄位會在下次寫入前截斷修復。
+多個寫入者以 expenses.ledger.lock 互斥 (Storage_module.WriterLock)。
+
+轉換既有 CSV：
+    python Columnar_module.py expenses.csv expenses.ledger
+"""
+import argparse
+import json
+import mmap
+import os
+from array import array
+from collections.abc import Mapping
+from datetime import date
+
+from Ledger_module import DateRangeIndex
+from Storage_module import (DURABILITY, DURABILITY_LEVELS, LEDGER_DIR, WriterLock, date_to_ordinal,
+                            iter_csv_records, ordinal_to_date, _fsync_directory)
+
+# --- 配置 (Configuration) ---
+# 欄位檔名 -> array typecode (與 NumPy dtype 相同寬度)
+COLUMNS = {
+    'notes.idx': 'Q',
+    'categories.u4': 'I',
+    'dates.i4': 'i',
+    'amounts.f8': 'd',
+}
+NUMPY_DTYPES = {'Q': 'u8', 'I': 'u4', 'i': 'i4', 'd': 'f8'}
+NOTES_BLOB = 'notes.bin'
+DICTIONARY = 'categories.txt'
+ODD_DATES = 'odd_dates.txt'
+COMMIT_COLUMN = 'amounts.f8'
+CONVERT_BATCH_ROWS = 100_000
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _row_count(path):
+    """各欄位中最短者的列數 (即已完整寫入的列數)。"""
+    counts = []
+    for name, typecode in COLUMNS.items():
+        try:
+            size = os.path.getsize(os.path.join(path, name))
+        except OSError:
+            return 0
+        counts.append(size // array(typecode).itemsize)
+    return min(counts)
+
+
+def _read_odd_dates(path, offset, rows):
+    """
+    從 offset 起讀取日期原文的側表，回傳 ({列號: 原文}, 新的 offset)。
+    只讀到列號小於 rows 的完整行：其餘是寫入者尚未提交 (或中斷) 的紀錄。
+    """
+    odd_dates = {}
+    try:
+        with open(os.path.join(path, ODD_DATES), 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                row, text = json.loads(line)
+                if row >= rows:
+                    break
+                odd_dates[row] = text
+                offset += len(line)
+    except FileNotFoundError:
+        pass
+    return odd_dates, offset
+
+
+def _read_dictionary(path):
+    try:
+        with open(os.path.join(path, DICTIONARY), encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+class ColumnarExpenseStore:
+    """欄式帳本的寫入端，介面與 CsvExpenseStore 相同。"""
+
+    def __init__(self, path=LEDGER_DIR, durability=None):
+        durability = durability or DURABILITY
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"未知的耐久度設定: {durability} (可用: {', '.join(DURABILITY_LEVELS)})")
+        self.path = path
+        self.durability = durability
+        self._categories = []
+        self._category_ids = {}
+        self._dictionary_size = -1
+
+    def initialize(self):
+        if os.path.isdir(self.path):
+            return False
+        self.append_many([])
+        return True
+
+    def append(self, record):
+        self.append_many([record])
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load_dictionary(self):
+        # 其他寫入者可能新增了類別：字典檔大小改變才重新讀取
+        try:
+            size = os.path.getsize(self._file(DICTIONARY))
+        except OSError:
+            size = 0
+        if size != self._dictionary_size:
+            self._categories = _read_dictionary(self.path)
+            self._category_ids = {c: i for i, c in enumerate(self._categories)}
+            self._dictionary_size = size
+
+    def _repair(self):
+        """把寫到一半的欄位截斷回最後一筆完整紀錄，回傳 (列數, 備註長度)。"""
+        rows = _row_count(self.path)
+        notes_end = 0
+        for name, typecode in COLUMNS.items():
+            itemsize = array(typecode).itemsize
+            with open(self._file(name), 'r+b') as f:
+                f.truncate(rows * itemsize)
+                if name == 'notes.idx' and rows:
+                    f.seek((rows - 1) * itemsize)
+                    ends = array(typecode)
+                    ends.frombytes(f.read(itemsize))
+                    notes_end = ends[0]
+        with open(self._file(NOTES_BLOB), 'r+b') as f:
+            f.truncate(notes_end)
+        with open(self._file(ODD_DATES), 'r+b') as f:
+            f.truncate(_read_odd_dates(self.path, 0, rows)[1])
+        return rows, notes_end
+
+    def append_many(self, records):
+        # 修復與追加必須在寫入鎖內進行：否則可能截斷另一個寫入者尚未寫完的欄位
+        with WriterLock(self.path):
+            self._append_locked(records)
+
+    def _append_locked(self, records):
+        created = not os.path.isdir(self.path)
+        os.makedirs(self.path, exist_ok=True)
+        for name in list(COLUMNS) + [NOTES_BLOB, DICTIONARY, ODD_DATES]:
+            open(self._file(name), 'ab').close()
+
+        row, notes_end = self._repair()
+        self._load_dictionary()
+
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        blob = bytearray()
+        odd_dates = []
+        new_categories = []
+        for record in records:
+            category = record['category']
+            if category not in self._category_ids:
+                self._category_ids[category] = len(self._categories)
+                self._categories.append(category)
+                new_categories.append(category)
+            blob += (record.get('notes') or '').encode('utf-8')
+            columns['notes.idx'].append(notes_end + len(blob))
+            columns['categories.u4'].append(self._category_ids[category])
+            ordinal = date_to_ordinal(record['date'])
+            if ordinal_to_date(ordinal) != (record['date'] or ''):
+                # 序數還原不回原文 (無法解析或不是 YYYY-MM-DD)：原文記在側表，讀取端照原樣顯示
+                odd_dates.append(json.dumps([row, record['date']], ensure_ascii=False) + '\n')
+            columns['dates.i4'].append(ordinal)
+            columns['amounts.f8'].append(float(record['amount']))
+            row += 1
+
+        # 寫入順序：備註 -> 字典 -> 日期原文 -> 各欄位，最後才寫 amounts.f8 (提交點)
+        self._write(NOTES_BLOB, bytes(blob))
+        if new_categories:
+            self._write(DICTIONARY, ''.join(json.dumps(c, ensure_ascii=False) + '\n'
+                                             for c in new_categories).encode('utf-8'))
+            self._dictionary_size = os.path.getsize(self._file(DICTIONARY))
+        if odd_dates:
+            self._write(ODD_DATES, ''.join(odd_dates).encode('utf-8'))
+        for name in COLUMNS:
+            self._write(name, columns[name].tobytes())
+
+        if created and self.durability == 'full':
+            _fsync_directory(self.path)
+
+    def _write(self, name, payload):
+        with open(self._file(name), 'ab') as f:
+            f.write(payload)
+            f.flush()
+            if self.durability != 'none':
+                os.fsync(f.fileno())
+
+
+class ColumnarDetails(Mapping):
+    """
+    以類別為鍵的明細檢視，介面與 category_data 相同。
+    只有被查詢的類別才會組成 (date, amount, note) 清單。
+    """
+
+    def __init__(self, ledger):
+        self._ledger = ledger
+        self._cache = {}
+
+    def __getitem__(self, category):
+        ledger = self._ledger
+        category_id = ledger.category_ids.get(category)
+        if category_id is None or category not in ledger.category_totals:
+            raise KeyError(category)
+        cached = self._cache.get(category_id)
+        if cached is not None and cached[0] == ledger.rows:
+            return cached[1]
+        import numpy as np
+        items = ledger.items(np.flatnonzero(ledger.categories == category_id))
+        self._cache[category_id] = (ledger.rows, items)
+        return items
+
+    def __iter__(self):
+        return iter(self._ledger.category_totals)
+
+    def __len__(self):
+        return len(self._ledger.category_totals)
+
+
+class ColumnarLedger:
+    """
+    欄式帳本的讀取端，介面與 LedgerAggregator 相同。
+    欄位以 mmap 對應並包成零複製的 NumPy 陣列；追加時只對新增的列做 bincount。
+    """
+
+    def __init__(self, path=LEDGER_DIR):
+        self.path = path
+        self.watch_path = os.path.join(path, COMMIT_COLUMN)
+        self.reset()
+
+    def reset(self):
+        import numpy as np
+        self.deltas = None
+        self.valid = False
+        self.rows = 0
+        self.category_names = []
+        self.category_ids = {}
+        self.category_totals = {}
+        self.category_data = ColumnarDetails(self)
+        self.date_index = DateRangeIndex()
+        # 無法由序數還原的日期原文 (列號 -> 原文) 與側表已讀到的位置
+        self.odd_dates = {}
+        self._odd_dates_offset = 0
+        self._sums = np.zeros(0)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._maps = []
+        self._signature = None
+        empty = np.zeros(0)
+        self.dates = self.categories = self.amounts = self.note_ends = empty
+        self.notes = b''
+
+    def _map(self, name, typecode=None):
+        import numpy as np
+        with open(os.path.join(self.path, name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b'' if typecode is None else np.zeros(0, dtype=NUMPY_DTYPES[typecode])
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        if typecode is None:
+            return mapped
+        return np.frombuffer(mapped, dtype=NUMPY_DTYPES[typecode],
+                             count=len(mapped) // array(typecode).itemsize)
+
+    def _signature_now(self):
+        signature = []
+        for name in (COMMIT_COLUMN, DICTIONARY):
+            st = os.stat(os.path.join(self.path, name))
+            signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        return tuple(signature)
+
+    def refresh(self):
+        import numpy as np
+        try:
+            signature = self._signature_now()
+        except OSError:
+            changed = self.valid
+            self.reset()
+            return changed
+        if signature == self._signature:
+            self.deltas = {}
+            return False
+
+        # 首次載入或欄位檔被替換 (inode 改變) 時整份重建
+        full = self._signature is None or signature[0][2] != self._signature[0][2]
+        self._signature = signature
+
+        rows = _row_count(self.path)
+        self._maps = []
+        self.note_ends = self._map('notes.idx', 'Q')[:rows]
+        self.categories = self._map('categories.u4', 'I')[:rows]
+        self.dates = self._map('dates.i4', 'i')[:rows]
+        self.amounts = self._map(COMMIT_COLUMN, 'd')[:rows]
+        self.notes = self._map(NOTES_BLOB)
+        self.category_names = _read_dictionary(self.path)
+        self.category_ids = {c: i for i, c in enumerate(self.category_names)}
+
+        # 只對新增的列做彙總；列數變少代表檔案被改寫，整份重算
+        size = len(self.category_names)
+        full = full or rows < self.rows
+        previous = 0 if full else self.rows
+        if full:
+            self._sums = np.zeros(size)
+            self._counts = np.zeros(size, dtype=np.int64)
+        new_ids = self.categories[previous:rows]
+        sums = np.bincount(new_ids, weights=self.amounts[previous:rows], minlength=size)
+        counts = np.bincount(new_ids, minlength=size)
+        self._sums = np.concatenate([self._sums, np.zeros(size - len(self._sums))]) + sums
+        self._counts = np.concatenate([self._counts, np.zeros(size - len(self._counts), dtype=np.int64)]) + counts
+
+        self.category_totals = {self.category_names[i]: float(self._sums[i])
+                                for i in np.flatnonzero(self._counts)}
+        if full:
+            self.date_index = DateRangeIndex()
+            self.odd_dates, self._odd_dates_offset = {}, 0
+        odd_dates, self._odd_dates_offset = _read_odd_dates(self.path, self._odd_dates_offset, rows)
+        self.odd_dates.update(odd_dates)
+        self._index_rows(previous, rows)
+        # 追加的列依類別分組成 deltas；整份重算時為 None (明細視窗全部重新顯示)
+        self.deltas = None
+        if not full:
+            self.deltas = {}
+            new_rows = np.arange(previous, rows)
+            for category_id in np.unique(new_ids).tolist():
+                self.deltas[self.category_names[category_id]] = self.items(new_rows[new_ids == category_id])
+
+        changed = rows != self.rows or full
+        self.rows = rows
+        self.valid = True
+        return changed
+
+    def _index_rows(self, start, stop):
+        """把 [start, stop) 的列依 (日期, 類別) 分組後加進日期區間索引。"""
+        import numpy as np
+        dates = self.dates[start:stop]
+        valid = dates > 0
+        dates = dates[valid].astype(np.int64)
+        ids = self.categories[start:stop][valid].astype(np.int64)
+        if not len(dates):
+            return
+        unique, inverse = np.unique((dates << 32) | ids, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=self.amounts[start:stop][valid])
+        days = unique >> 32
+        # 序數 -> datetime64[D] -> datetime64[M]，換算成與 month_key 相同的月份鍵
+        months = (days - _EPOCH).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) + 1970 * 12
+        for day, month, category_id, amount in zip(days.tolist(), months.tolist(),
+                                                   (unique & 0xFFFFFFFF).tolist(), sums.tolist()):
+            self.date_index.add_bucket(day, month, self.category_names[category_id], amount)
+
+    def range_totals(self, start=None, end=None):
+        return self.date_index.query(start, end)
+
+    def items(self, rows):
+        """將列號陣列組成 (date, amount, note) 清單。"""
+        dates = self.dates[rows].tolist()
+        amounts = self.amounts[rows].tolist()
+        odd_dates = self.odd_dates
+        return [(odd_dates[r] if r in odd_dates else ordinal_to_date(d), a, self.note(r))
+                for r, d, a in zip(rows.tolist(), dates, amounts)]
+
+    def note(self, row):
+        start = int(self.note_ends[row - 1]) if row else 0
+        return self.notes[start:int(self.note_ends[row])].decode('utf-8', errors='replace')
+
+
+# --- CSV 轉換 (CSV conversion) ---
+
+def convert_csv(csv_path, ledger_path=LEDGER_DIR, durability='none'):
+    """
+    將既有的 expenses.csv 串流轉換成欄式帳本，回傳 (轉換列數, 略過列數)。
+    略過規則與視覺化模組相同：金額無法解析或類別為空的列不轉換。
+    """
+    store = ColumnarExpenseStore(ledger_path, durability=durability)
+    store.initialize()
+    converted = skipped = 0
+    batch = []
+    for record in iter_csv_records(csv_path):
+        if record is None:
+            skipped += 1
+            continue
+        batch.append(record)
+        if len(batch) >= CONVERT_BATCH_ROWS:
+            store.append_many(batch)
+            converted += len(batch)
+            batch = []
+    if batch:
+        store.append_many(batch)
+        converted += len(batch)
+    return converted, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='將 expenses.csv 轉換為欄式二進位帳本')
+    parser.add_argument('csv_path', nargs='?', default='expenses.csv')
+    parser.add_argument('ledger_path', nargs='?', default=LEDGER_DIR)
+    args = parser.parse_args(argv)
+    if os.path.exists(args.ledger_path):
+        parser.error(f"{args.ledger_path} 已存在，請先移除或指定其他路徑")
+    converted, skipped = convert_csv(args.csv_path, args.ledger_path)
+    print(f"已轉換 {converted} 筆紀錄到 {args.ledger_path} (略過 {skipped} 筆無效紀錄)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+批次匯入 (Bulk import)：把銀行對帳單或其他 CSV 一次匯入帳本。
+
+來源檔以 pandas 分塊串流讀取，記憶體用量只和 IMPORT_CHUNK_ROWS 有關、與檔案大小無關。
+每一塊都以整欄向量化的方式套用與 ExpenseApp.validate_input 相同的規則 (錯誤訊息也相同)：
+    - 日期必須符合日期格式 (預設 DATE_FORMAT，銀行匯出可用 date_format 指定)
+    - 金額必須是數字且為正數
+    - 類別不能為空
+通過驗證的列以一次 append_many 批次寫入帳本 (每塊一次寫入)，
+未通過的列連同列號與錯誤原因寫入退件報告 CSV。
+
+    python Import_module.py bank_2024_05.csv --rejects rejected.csv
+    python Import_module.py bank.csv --map date=交易日期 amount=支出金額 notes=摘要 \\
+        --date-format %Y/%m/%d --default-category 銀行 --encoding big5
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from Input_module import (DATE_FORMAT, ERROR_AMOUNT_INVALID, ERROR_AMOUNT_NOT_POSITIVE,
+                          ERROR_CATEGORY_EMPTY, ERROR_DATE)
+from Storage_module import ENCODING, FIELDNAMES, open_store
+
+# --- 配置 (Configuration) ---
+# 每次讀入並驗證的列數 (決定匯入時的記憶體上限)
+IMPORT_CHUNK_ROWS = int(os.environ.get('EXPENSES_IMPORT_CHUNK_ROWS', '50000'))
+# 退件報告的附加欄位
+ROW_COLUMN = 'row'
+ERRORS_COLUMN = 'errors'
+
+
+def validate_chunk(chunk, date_format=DATE_FORMAT, negate=False):
+    """
+    以整欄運算驗證一塊資料 (欄位已對應成 date / amount / category / notes 且已去除前後空白)。
+    回傳 (accepted, errors)：accepted 為正規化後可寫入的 DataFrame，
+    errors 為與 chunk 同索引、內容為錯誤訊息 (以換行分隔，同 validate_input) 的 Series，
+    通過驗證的列為空字串。negate 為 True 時先把金額變號 (銀行對帳單常以負數表示支出)。
+    """
+    dates = pd.to_datetime(chunk['date'], format=date_format, errors='coerce')
+    # 一律轉成浮點數 (同 save_expense 的 float())：整塊都是整數時 pandas 會推成整數欄，寫入的格式就會因分塊而不同
+    amounts = pd.to_numeric(chunk['amount'], errors='coerce').astype(float)
+    if negate:
+        amounts = -amounts
+
+    bad_date = dates.isna()
+    bad_number = amounts.isna()
+    not_positive = ~bad_number & (amounts <= 0)
+    no_category = chunk['category'] == ''
+
+    # 與 validate_input 相同的檢查順序：日期 -> 金額 -> 類別
+    errors = pd.Series('', index=chunk.index, dtype=object)
+    for mask, message in ((bad_date, ERROR_DATE),
+                          (bad_number, ERROR_AMOUNT_INVALID),
+                          (not_positive, ERROR_AMOUNT_NOT_POSITIVE),
+                          (no_category, ERROR_CATEGORY_EMPTY)):
+        errors[mask] = errors[mask] + message + '\n'
+    errors = errors.str.rstrip('\n')
+
+    ok = errors == ''
+    accepted = pd.DataFrame({
+        # 帳本一律存成 DATE_FORMAT，與 save_expense 寫入的格式一致
+        'date': dates[ok].dt.strftime(DATE_FORMAT),
+        'amount': amounts[ok].round(2),
+        'category': chunk['category'][ok],
+        'notes': chunk['notes'][ok],
+    })
+    return accepted, errors
+
+
+def _prepare(chunk, columns, default_category):
+    """把來源欄位對應成帳本欄位，全部轉成去除前後空白的字串 (同 save_expense 的 .strip())。"""
+    prepared = pd.DataFrame(index=chunk.index)
+    for field in FIELDNAMES:
+        source = columns.get(field, field)
+        if source in chunk.columns:
+            prepared[field] = chunk[source].fillna('').str.strip()
+        else:
+            prepared[field] = ''
+    if default_category:
+        prepared.loc[prepared['category'] == '', 'category'] = default_category
+    return prepared
+
+
+def import_file(source, store=None, rejects_path=None, columns=None, date_format=DATE_FORMAT,
+                encoding=ENCODING, negate=False, default_category='', chunk_rows=None,
+                progress=None):
+    """
+    串流匯入 source，回傳 (匯入列數, 退件列數)。
+    columns 為 {帳本欄位: 來源欄位} 的對應 (未列出的欄位沿用同名欄位)；
+    rejects_path 不為 None 時寫出退件報告：列號 (資料列由 1 起算)、原始欄位與錯誤原因。
+    progress(imported, rejected) 會在每塊處理完後呼叫。
+    注意：每塊各自是一次完整寫入，但整個匯入不是單一交易；中途失敗時已寫入的區塊會保留。
+    """
+    owns_store = store is None
+    if owns_store:
+        # 自行開啟的 store 也由這裡關閉 (SQLite 連線不能跨執行緒共用，背景匯入需要自己的連線)
+        store = open_store()
+    try:
+        return _import_chunks(source, store, rejects_path, columns or {}, date_format, encoding,
+                              negate, default_category, chunk_rows or IMPORT_CHUNK_ROWS, progress)
+    finally:
+        if owns_store and hasattr(store, 'close'):
+            store.close()
+
+
+def _import_chunks(source, store, rejects_path, columns, date_format, encoding, negate,
+                   default_category, chunk_rows, progress):
+    store.initialize()
+    imported = rejected = 0
+    wrote_rejects_header = False
+
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, encoding=encoding,
+                         chunksize=chunk_rows, skip_blank_lines=True)
+    for chunk in reader:
+        prepared = _prepare(chunk, columns, default_category)
+        accepted, errors = validate_chunk(prepared, date_format, negate)
+
+        if len(accepted):
+            store.append_many(accepted.to_dict('records'))
+            imported += len(accepted)
+
+        bad = errors != ''
+        if bad.any():
+            rejected += int(bad.sum())
+            if rejects_path is not None:
+                report = chunk[bad].copy()
+                report.insert(0, ROW_COLUMN, chunk.index[bad] + 1)
+                report[ERRORS_COLUMN] = errors[bad].str.replace('\n', ' ')
+                report.to_csv(rejects_path, mode='a' if wrote_rejects_header else 'w',
+                              header=not wrote_rejects_header, index=False, encoding=ENCODING)
+                wrote_rejects_header = True
+        if progress is not None:
+            progress(imported, rejected)
+    return imported, rejected
+
+
+def _parse_mapping(pairs):
+    columns = {}
+    for pair in pairs or ():
+        field, sep, source = pair.partition('=')
+        if not sep or field not in FIELDNAMES:
+            raise argparse.ArgumentTypeError(f"無效的欄位對應: {pair} (格式為 {'|'.join(FIELDNAMES)}=來源欄位)")
+        columns[field] = source
+    return columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批次匯入 CSV / 銀行對帳單到帳本')
+    parser.add_argument('source')
+    parser.add_argument('--rejects', help='退件報告的輸出路徑 (CSV)')
+    parser.add_argument('--map', nargs='+', metavar='FIELD=COLUMN', help='帳本欄位對應到來源欄位')
+    parser.add_argument('--date-format', default=DATE_FORMAT)
+    parser.add_argument('--encoding', default=ENCODING)
+    parser.add_argument('--negate', action='store_true', help='來源以負數表示支出時使用')
+    parser.add_argument('--default-category', default='', help='類別欄位為空時使用的類別')
+    parser.add_argument('--chunk-rows', type=int, default=IMPORT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    try:
+        columns = _parse_mapping(args.map)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    imported, rejected = import_file(args.source, rejects_path=args.rejects, columns=columns,
+                                     date_format=args.date_format, encoding=args.encoding,
+                                     negate=args.negate, default_category=args.default_category,
+                                     chunk_rows=args.chunk_rows)
+    print(f"已匯入 {imported} 筆紀錄 (退件 {rejected} 筆)")
+    if rejected and args.rejects:
+        print(f"退件報告: {args.rejects}")
+
+
+if __name__ == '__main__':
+    main()
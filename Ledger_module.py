@@ -0,0 +1,678 @@
+import csv
+import io
+import os
+import re
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from datetime import date, timedelta
+from functools import reduce
+from heapq import merge
+from operator import add
+
+from Profile_module import count, timed
+from Storage_module import BOM, date_to_ordinal, ordinal_to_date
+
+# --- 配置 (Configuration) ---
+READ_CHUNK_SIZE = 8 * 1024 * 1024
+# 記住上次讀取位置之前的一小段內容，用來偵測檔案是否被改寫
+PROBE_SIZE = 256
+# 已排序的明細索引一次要插入超過這麼多列時改用合併 (逐列插入每次都要搬移陣列)
+MERGE_THRESHOLD = 32
+# 冷啟動時帳本超過此大小 (bytes) 才以多個行程平行解析；LOAD_WORKERS 為行程數
+PARALLEL_LOAD_BYTES = int(os.environ.get('EXPENSES_PARALLEL_LOAD_BYTES', str(64 * 1024 * 1024)))
+LOAD_WORKERS = int(os.environ.get('EXPENSES_LOAD_WORKERS', str(os.cpu_count() or 1)))
+# 尋找表頭時最多讀取的位元組數
+HEADER_PROBE_SIZE = 64 * 1024
+
+
+def sort_items(items):
+    """明細的顯示順序：依日期由新到舊排序 (同日期保留原本順序)。SortedRows 已經是這個順序，直接回傳。"""
+    if isinstance(items, SortedRows):
+        return items
+    return sorted(items, key=lambda x: x[0] or '', reverse=True)
+
+
+# 引號的判斷與 csv.reader 相同：只有欄位開頭 (資料開頭或逗號、換行之後) 的引號開始引號欄位，
+# 欄位內以 "" 表示引號；未加引號的欄位中出現的引號 (例如 5" screen) 是一般字元。
+# 沒有結束的引號欄位比對到資料結尾，因此依序比對不會跳過任何一個欄位開頭的引號
+QUOTED_FIELD = re.compile(rb'"[^"]*(?:""[^"]*)*(?:"(?!")|\Z)')
+# 逗號或換行之後的引號欄位 (比對結果含前面的分隔字元；以字面字元開頭，搜尋較快)
+NEXT_QUOTED_FIELD = re.compile(rb'[,\r\n]"[^"]*(?:""[^"]*)*(?:"(?!")|\Z)')
+
+
+def record_boundary(data):
+    """
+    回傳 data 中最後一筆「完整紀錄」結束的位置 (不含則為 0)。
+    data 必須從紀錄邊界開始；引號欄位內的換行 (備註含換行) 不算紀錄結尾。
+    """
+    spans = []
+    if data[:1] == b'"':
+        spans.append(QUOTED_FIELD.match(data).span())
+    # 依序比對才不會把引號欄位內的 ," 當成另一個欄位的開頭
+    spans += [(m.start() + 1, m.end()) for m in NEXT_QUOTED_FIELD.finditer(data, spans[0][1] if spans else 0)]
+    # 由後往前找第一個不在引號欄位內的換行
+    newline = data.rfind(b'\n')
+    i = len(spans)
+    while newline != -1:
+        while i and spans[i - 1][0] > newline:
+            i -= 1
+        if not i or newline >= spans[i - 1][1]:
+            return newline + 1
+        newline = data.rfind(b'\n', 0, spans[i - 1][0])
+    return 0
+
+
+def next_record_end(data, pos, end=None):
+    """
+    回傳 data 中從 pos (紀錄邊界) 開始的第一筆完整紀錄的結束位置，找不到時回傳 -1。
+    引號的判斷與 record_boundary 相同。
+    """
+    start = pos
+    end = len(data) if end is None else end
+    while True:
+        newline = data.find(b'\n', pos, end)
+        quote = data.find(b'"', pos, end if newline == -1 else newline)
+        if quote == -1:
+            return newline if newline == -1 else newline + 1
+        if quote == start or data[quote - 1] in b',\r\n':
+            pos = QUOTED_FIELD.match(data, quote, end).end()
+        else:
+            pos = quote + 1
+
+
+def count_quotes(data, start, end):
+    """
+    data[start:end] 中的引號數。mmap 沒有 count()，每次只切出 READ_CHUNK_SIZE 大小的視窗計數，
+    不會把兩個切點之間 (檔案大小 / 段數) 的內容一次複製到記憶體。
+    """
+    return sum(data[i:min(i + READ_CHUNK_SIZE, end)].count(b'"') for i in range(start, end, READ_CHUNK_SIZE))
+
+
+def split_records(data, start, stop, parts):
+    """
+    把 data[start:stop] 切成最多 parts 段，回傳邊界清單 [start, ..., stop]。
+    start 必須是紀錄邊界；每個切點都落在引號數為偶數 (從 start 起算) 的換行之後。
+    這只是快速的估計：未加引號的欄位中出現引號時切點可能落在引號欄位之中，
+    呼叫端需確認前一段正好解析到切點 (見 LedgerAggregator._load_parallel)。
+    data 可以是 bytes 或 mmap (見 count_quotes)。
+    """
+    bounds = [start]
+    pos, quotes = start, 0
+    for i in range(1, parts):
+        target = max(start + (stop - start) * i // parts, pos)
+        newline = data.find(b'\n', target, stop)
+        while newline != -1:
+            quotes += count_quotes(data, pos, newline)
+            pos = newline
+            if quotes % 2 == 0:
+                break
+            newline = data.find(b'\n', newline + 1, stop)
+        if newline == -1:
+            break
+        if newline + 1 < stop:
+            bounds.append(newline + 1)
+    bounds.append(stop)
+    return bounds
+
+
+# --- 明細儲存 (Compact detail store) ---
+
+class DetailStore(Mapping):
+    """
+    精簡的明細儲存，介面與 {category: [(date, amount, note), ...]} 相同。
+    類別字串只存一份 (以類別代碼索引)，日期存成整數序數 (array('i'))、金額存成 array('d')，
+    所有備註串接在同一個 UTF-8 緩衝區並以結束位置索引：每列約 24 bytes + 備註長度，
+    不必為每列保留一個 tuple 與日期、金額、備註三個物件。
+
+    store[category] 回傳依日期由新到舊的 SortedRows 檢視，只有被讀取的列才組成 tuple。
+    每個類別的排序索引在第一次讀取時建立，之後新增的列以插入 / 合併維持順序，不再整份重新排序。
+    """
+
+    def __init__(self):
+        self.category_ids = {}
+        self.category_names = []
+        self.dates = array('i')
+        self.amounts = array('d')
+        self.note_ends = array('Q')
+        self.notes = bytearray()
+        # 無法由序數還原的日期 (不是 YYYY-MM-DD 或欄位不足) 與欄位不足的備註，以列號記錄原值
+        self.odd_dates = {}
+        self.missing_notes = set()
+        # 類別代碼 -> 已排序的列號 / 尚未排入的列號 (檔案順序)
+        self._sorted = []
+        self._pending = []
+        # 日期字串 <-> 序數；帳本裡的日期大量重複，每個字串只解析一次
+        self._date_codes = {}
+        self._date_texts = {}
+
+    def __getitem__(self, category):
+        category_id = self.category_ids.get(category)
+        if category_id is None:
+            raise KeyError(category)
+        return SortedRows(self, category_id)
+
+    def __iter__(self):
+        return iter(self.category_names)
+
+    def __len__(self):
+        return len(self.category_names)
+
+    def _date_code(self, date_str):
+        ordinal = date_to_ordinal(date_str)
+        code = ordinal if ordinal and ordinal_to_date(ordinal) == date_str else 0
+        self._date_codes[date_str] = code
+        if code:
+            self._date_texts[code] = date_str
+        return code
+
+    def append(self, date_str, amount, category, note):
+        row = len(self.amounts)
+        category_id = self.category_ids.get(category)
+        if category_id is None:
+            category_id = self.category_ids[category] = len(self.category_names)
+            self.category_names.append(category)
+            self._sorted.append(array('I'))
+            self._pending.append(array('I'))
+        code = self._date_codes.get(date_str)
+        if code is None:
+            code = self._date_code(date_str)
+        if not code:
+            self.odd_dates[row] = date_str
+        self.dates.append(code)
+        self.amounts.append(amount)
+        if note is None:
+            self.missing_notes.add(row)
+        else:
+            self.notes += note.encode('utf-8')
+        self.note_ends.append(len(self.notes))
+        self._pending[category_id].append(row)
+
+    def extend(self, other):
+        """
+        把 other (帳本中緊接在後的一段，尚未建立排序索引) 併到尾端，
+        結果與逐列 append 相同：類別代碼依第一次出現的順序分配，列號與備註位置平移。
+        """
+        row_base, note_base = len(self.amounts), len(self.notes)
+        for local_id, category in enumerate(other.category_names):
+            category_id = self.category_ids.get(category)
+            if category_id is None:
+                category_id = self.category_ids[category] = len(self.category_names)
+                self.category_names.append(category)
+                self._sorted.append(array('I'))
+                self._pending.append(array('I'))
+            self._pending[category_id].extend(map(row_base.__add__, other._pending[local_id]))
+        self.dates.extend(other.dates)
+        self.amounts.extend(other.amounts)
+        self.note_ends.extend(map(note_base.__add__, other.note_ends))
+        self.notes += other.notes
+        self.odd_dates.update((row_base + row, text) for row, text in other.odd_dates.items())
+        self.missing_notes.update(row_base + row for row in other.missing_notes)
+        self._date_codes.update(other._date_codes)
+        self._date_texts.update(other._date_texts)
+
+    def date_text(self, row):
+        code = self.dates[row]
+        return self._date_texts[code] if code else self.odd_dates[row]
+
+    def item(self, row):
+        """第 row 列的 (date, amount, note)，與原本 CSV 讀出的值相同。"""
+        if row in self.missing_notes:
+            note = None
+        else:
+            note = self.notes[self.note_ends[row - 1] if row else 0:self.note_ends[row]].decode('utf-8')
+        return self.date_text(row), self.amounts[row], note
+
+    def _sort_key(self, row):
+        # 與 sort_items 相同：依日期字串比較，沒有日期視為空字串
+        return self.date_text(row) or ''
+
+    def _insert_position(self, rows, key):
+        """rows 依日期由新到舊；回傳 key 的插入位置 (排在日期相同的既有列之後)。"""
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._sort_key(rows[mid]) >= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def sorted_rows(self, category_id):
+        """類別的列號，依日期由新到舊 (同日期依檔案順序)；把尚未排入的新列併入排序索引。"""
+        pending = self._pending[category_id]
+        if pending:
+            key = self._sort_key
+            rows = self._sorted[category_id]
+            if not rows:
+                rows = array('I', sorted(pending, key=key, reverse=True))
+            elif len(pending) > MERGE_THRESHOLD:
+                # heapq.merge 是穩定的：日期相同時既有的列 (檔案中較前面) 排在前面
+                rows = array('I', merge(rows, sorted(pending, key=key, reverse=True), key=key, reverse=True))
+            else:
+                for row in pending:
+                    rows.insert(self._insert_position(rows, key(row)), row)
+            self._sorted[category_id] = rows
+            self._pending[category_id] = array('I')
+        return self._sorted[category_id]
+
+    def row_count(self, category_id):
+        return len(self._sorted[category_id]) + len(self._pending[category_id])
+
+
+class SortedRows(Sequence):
+    """
+    DetailStore 中一個類別的即時檢視，依日期由新到舊排列 (同 sort_items)。
+    只有被索引的列才組成 (date, amount, note)，明細表格可以直接分頁顯示，不必複製或重新排序。
+    """
+    __slots__ = ('store', 'category_id')
+
+    def __init__(self, store, category_id):
+        self.store = store
+        self.category_id = category_id
+
+    def __len__(self):
+        return self.store.row_count(self.category_id)
+
+    def __getitem__(self, index):
+        rows = self.store.sorted_rows(self.category_id)
+        if isinstance(index, slice):
+            return [self.store.item(row) for row in rows[index]]
+        return self.store.item(rows[index])
+
+    def __iter__(self):
+        return map(self.store.item, self.store.sorted_rows(self.category_id))
+
+
+def read_header(f):
+    """
+    讀取檔案開頭的表頭 (略過 BOM 與空白列，同 LedgerAggregator._parse)，不移動解析狀態。
+    回傳 (欄位清單, 表頭之後的位元組位置)；前 HEADER_PROBE_SIZE 位元組內找不到表頭時回傳 (None, 0)。
+    """
+    f.seek(0)
+    data = f.read(HEADER_PROBE_SIZE)
+    pos = len(BOM) if data.startswith(BOM) else 0
+    while True:
+        end = next_record_end(data, pos)
+        if end == -1:
+            return None, 0
+        row = next(csv.reader(io.StringIO(data[pos:end].decode('utf-8', errors='replace'), newline='')), [])
+        if row:
+            return row, end
+        pos = end
+
+
+def header_columns(header):
+    """將表頭轉成 {小寫欄位名: 欄位索引}，整個檔案只需建立一次。"""
+    return {name.lower(): i for i, name in enumerate(header)}
+
+
+def month_key(day):
+    """date -> 月份鍵 (year * 12 + month - 1)，相鄰月份的鍵也相鄰。"""
+    return day.year * 12 + day.month - 1
+
+
+def split_range(start, end):
+    """
+    把 [start, end] (含兩端) 拆成 (零散日期區間清單, 完整月份區間)。
+    完整月份以 (第一個月份鍵, 最後一個月份鍵) 表示，沒有完整月份時為 None。
+    例如 1/15 ~ 4/10 -> ([(1/15, 1/31), (4/1, 4/10)], (2 月, 3 月))
+    """
+    if start > end:
+        return [], None
+    first_full = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    after_end = end + timedelta(days=1)
+    last_full = end if after_end.day == 1 else end.replace(day=1) - timedelta(days=1)
+    if first_full > last_full:
+        return [(start, end)], None
+    days = []
+    if start < first_full:
+        days.append((start, first_full - timedelta(days=1)))
+    if last_full < end:
+        days.append((last_full + timedelta(days=1), end))
+    return days, (month_key(first_full), month_key(last_full))
+
+
+class DateRangeIndex:
+    """
+    依日期預先彙總的類別總計：每日一個桶，並彙總成每月的桶。
+    隨新增的列增量維護；查詢任意日期區間的成本只和桶數 (零散天數 + 月數) 有關，與列數無關。
+    每月的桶在查詢時才從有變動的月份重新彙總，新增一列只需更新當日的桶。
+    """
+
+    def __init__(self):
+        self.days = {}
+        self.first = None
+        self.last = None
+        self._months = {}
+        self._dirty_months = set()
+        # 日期字串 -> (當日的桶, 月份鍵)；帳本裡的日期大量重複，每個字串只解析一次
+        self._keys = {}
+
+    def _day_bucket(self, ordinal):
+        bucket = self.days.get(ordinal)
+        if bucket is None:
+            bucket = self.days[ordinal] = defaultdict(float)
+            if self.first is None or ordinal < self.first:
+                self.first = ordinal
+            if self.last is None or ordinal > self.last:
+                self.last = ordinal
+        return bucket
+
+    def add(self, date_str, category, amount):
+        keys = self._keys.get(date_str)
+        if keys is None:
+            ordinal = date_to_ordinal(date_str)
+            keys = (self._day_bucket(ordinal), month_key(date.fromordinal(ordinal))) if ordinal else False
+            self._keys[date_str] = keys
+        if keys:
+            keys[0][category] += amount
+            self._dirty_months.add(keys[1])
+
+    def extend(self, ordinal, category, amounts):
+        """依檔案順序加入同一天、同一類別的多筆金額，結果與逐筆 add 完全相同 (浮點數加總順序不變)。"""
+        bucket = self._day_bucket(ordinal)
+        bucket[category] = reduce(add, amounts, bucket[category])
+        self._dirty_months.add(month_key(date.fromordinal(ordinal)))
+
+    def add_bucket(self, ordinal, month, category, amount):
+        self._day_bucket(ordinal)[category] += amount
+        self._dirty_months.add(month)
+
+    def _month_bucket(self, month):
+        if month in self._dirty_months:
+            self._dirty_months.discard(month)
+            first = date(month // 12, month % 12 + 1, 1).toordinal()
+            last = date(month // 12 + (month % 12 == 11), (month + 1) % 12 + 1, 1).toordinal()
+            totals = defaultdict(float)
+            for ordinal in range(first, last):
+                for category, amount in self.days.get(ordinal, {}).items():
+                    totals[category] += amount
+            self._months[month] = totals
+        return self._months.get(month)
+
+    def query(self, start=None, end=None):
+        """回傳 [start, end] (date，None 代表不限) 之間的 {category: total}；日期無法解析的列不計入。"""
+        totals = defaultdict(float)
+        if self.first is None:
+            return totals
+        start = max(start.toordinal(), self.first) if start else self.first
+        end = min(end.toordinal(), self.last) if end else self.last
+        days, months = split_range(date.fromordinal(start), date.fromordinal(end)) if start <= end else ([], None)
+        buckets = []
+        for first, last in days:
+            buckets.extend(self.days.get(o) for o in range(first.toordinal(), last.toordinal() + 1))
+        if months:
+            buckets.extend(self._month_bucket(m) for m in range(months[0], months[1] + 1))
+        for bucket in buckets:
+            if bucket:
+                for category, amount in bucket.items():
+                    totals[category] += amount
+        return totals
+
+
+class LedgerAggregator:
+    """
+    持續性的帳本彙總器。
+    記住上次讀到的位元組位置，檔案只被追加時只解析新增的尾端；
+    偵測到截斷、改寫或 inode 變更時才整份重建。
+
+    每次 refresh 後 self.deltas 記錄各類別這次追加的明細 ({category: [(date, amount, note), ...]})，
+    讓明細視窗只修補受影響的列；首次載入或整份重建時為 None (已開啟的明細視窗整份重新顯示)。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.watch_path = path
+        self.reset()
+
+    def reset(self):
+        self.deltas = None
+        self.category_totals = defaultdict(float)
+        self.category_data = DetailStore()
+        self.date_index = DateRangeIndex()
+        self.valid = False
+        self._columns = None
+        self._width = 0
+        self._offset = 0
+        self._open_tail = False
+        self._header_probe = b''
+        self._tail_probe = b''
+        self._identity = None
+        self._signature = None
+
+    # --- 變更偵測 ---
+
+    def _read_at(self, f, offset, size):
+        f.seek(offset)
+        return f.read(size)
+
+    def _is_append_only(self, f, st):
+        """判斷自上次讀取後，檔案是否只在尾端追加了內容。"""
+        if self._identity != (st.st_dev, st.st_ino) or self._open_tail:
+            return False
+        if st.st_size < self._offset:
+            return False  # 截斷
+        if st.st_size == self._offset:
+            return False  # 大小不變但內容被改動 (原地改寫)
+        if self._read_at(f, 0, len(self._header_probe)) != self._header_probe:
+            return False
+        start = self._offset - len(self._tail_probe)
+        return self._read_at(f, start, len(self._tail_probe)) == self._tail_probe
+
+    def refresh(self):
+        """
+        讀取檔案的新內容，回傳資料是否有變化。
+        檔案不存在或缺少 category 欄位時 self.valid 為 False。
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            changed = self.valid or self._signature is not None
+            self.reset()
+            return changed
+
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if signature == self._signature:
+            self.deltas = {}
+            return False
+
+        try:
+            with open(self.path, 'rb') as f:
+                if self._signature is not None and not self._is_append_only(f, st):
+                    self.reset()
+                before = self._offset
+                # 只有尾端追加時才逐筆記錄新增的明細；整份載入或重建時不比對新舊明細 (比對比重新載入還慢)
+                self.deltas = {} if before else None
+                self._consume(f)
+                self._identity = (st.st_dev, st.st_ino)
+                self._signature = signature
+                return self._offset != before or before == 0
+        except OSError:
+            self.reset()
+            return False
+
+    # --- 解析 ---
+
+    def _consume(self, f):
+        if self._offset or not self._load_parallel(f):
+            self._consume_blocks(f)
+
+        # 檔尾沒有換行 (或停在沒有結束的引號欄位內) 的最後一筆：與 csv.reader 相同，讀到檔尾就算一筆。
+        # 它可能只寫了一半，下次檔案變動時整份重建，不在它之後接著讀
+        tail = self._read_at(f, self._offset, -1)
+        if tail:
+            self._parse(tail)
+            self._offset += len(tail)
+            self._open_tail = True
+
+        if self._offset:
+            self._header_probe = self._read_at(f, 0, min(self._offset, PROBE_SIZE))
+            self._tail_probe = self._read_at(f, max(0, self._offset - PROBE_SIZE),
+                                             min(self._offset, PROBE_SIZE))
+
+    def _consume_blocks(self, f, stop=None):
+        """從 self._offset 逐塊解析到檔尾 (或 stop)，停在最後一筆完整紀錄之後。"""
+        f.seek(self._offset)
+        carry = b''
+        while True:
+            size = READ_CHUNK_SIZE if stop is None else min(READ_CHUNK_SIZE, stop - self._offset - len(carry))
+            block = f.read(size) if size > 0 else b''
+            if not block:
+                break
+            data = carry + block
+            cut = record_boundary(data)
+            if cut:
+                self._parse(data[:cut])
+                self._offset += cut
+            carry = data[cut:]
+
+    def _load_parallel(self, f):
+        """
+        冷啟動的大帳本：在引號外的換行切成 LOAD_WORKERS 段，以行程池平行解析，再依檔案順序合併。
+        合併後的總計、明細與日期索引和逐塊解析完全相同 (略過無效列的規則相同、浮點數依原順序加總)。
+        回傳是否已載入；檔案太小、表頭無效或行程池無法使用時回傳 False，改為逐塊解析。
+        """
+        size = os.fstat(f.fileno()).st_size
+        if LOAD_WORKERS < 2 or size < PARALLEL_LOAD_BYTES:
+            return False
+        header, start = read_header(f)
+        if header is None or 'category' not in header_columns(header):
+            return False
+        import mmap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            bounds = split_records(data, start, size, LOAD_WORKERS)
+        if len(bounds) < 3:
+            return False
+
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+        jobs = [(self.path, first, last, header) for first, last in zip(bounds, bounds[1:])]
+        self._set_header(header)
+        self._offset = start
+        merged = 0
+        try:
+            # spawn：呼叫端 (視覺化模組) 可能有其他執行緒，fork 出的子行程可能卡在別的執行緒持有的鎖
+            with ProcessPoolExecutor(len(jobs), mp_context=get_context('spawn')) as pool:
+                for (_, first, _, _), (consumed, details, days) in zip(jobs, pool.map(_parse_range, jobs)):
+                    if first != self._offset:
+                        break  # 前一段沒有正好解析到切點：切點落在引號欄位內，或檔案在讀取期間被改寫
+                    self._merge(details, days)
+                    self._offset = first + consumed
+                    merged += 1
+        except Exception:  # BrokenProcessPool、工作行程的 PicklingError / MemoryError 等：改為逐塊解析
+            merged = 0
+        if merged != len(jobs):
+            self.reset()
+            return False
+        return True
+
+    @timed('merge')
+    def _merge(self, details, days):
+        """併入緊接在後的一段 (_parse_range 的結果)：每個總計都從目前的值接著依檔案順序累加。"""
+        totals = self.category_totals
+        for local_id, category in enumerate(details.category_names):
+            totals[category] = reduce(add, map(details.amounts.__getitem__, details._pending[local_id]),
+                                      totals[category])
+        self.category_data.extend(details)
+        for (ordinal, category), amounts in days.amounts.items():
+            self.date_index.extend(ordinal, category, amounts)
+
+    @timed('parse')
+    def _parse(self, chunk):
+        count('parse.bytes', len(chunk))
+        header_needed = self._columns is None
+        if header_needed and self._offset == 0 and chunk.startswith(BOM):
+            chunk = chunk[len(BOM):]
+        reader = csv.reader(io.StringIO(chunk.decode('utf-8', errors='replace'), newline=''))
+
+        if header_needed:
+            header = next(reader, None)
+            while header == []:
+                header = next(reader, None)
+            if not header:
+                return
+            self._set_header(header)
+
+        if not self.valid:
+            return
+
+        totals = self.category_totals
+        append = self.category_data.append
+        deltas = self.deltas
+        date_index = self.date_index
+        width = self._width
+        i_amount, i_category, i_date, i_notes = self._indices
+        for row in reader:
+            # 與 csv.DictReader 相同：略過空白列；欄位過多的列無法對應表頭，略過
+            if not row or len(row) > width:
+                continue
+            # 欄位不足時視為 None (同 DictReader)；缺少 amount/date 欄位的列會被略過
+            size = len(row)
+            try:
+                amt = float(row[i_amount] if i_amount < size else None)
+                cat = row[i_category] if i_category < size else None
+                date = row[i_date] if i_date < size else None
+                note = '' if i_notes is None else (row[i_notes] if i_notes < size else None)
+                if cat:
+                    totals[cat] += amt
+                    append(date, amt, cat, note)
+                    date_index.add(date, cat, amt)
+                    if deltas is not None:
+                        if cat not in deltas:
+                            deltas[cat] = []
+                        deltas[cat].append((date, amt, note))
+            except (ValueError, IndexError, TypeError):
+                continue
+
+    def range_totals(self, start=None, end=None):
+        """指定日期區間的類別總計 (成本與桶數有關，與列數無關)。"""
+        return self.date_index.query(start, end)
+
+    def _set_header(self, header):
+        self._columns = header_columns(header)
+        self._width = len(header)
+        self.valid = 'category' in self._columns
+        if self.valid:
+            self._indices = (
+                self._columns.get('amount'),
+                self._columns['category'],
+                self._columns.get('date'),
+                self._columns.get('notes'),
+            )
+
+
+# --- 平行載入 (Parallel cold load) ---
+
+class DayAmounts:
+    """
+    平行載入時工作行程使用的日期索引：不加總，依第一次出現的順序收集 {(日期序數, 類別): array('d')}，
+    由主行程以 DateRangeIndex.extend 依檔案順序併入 (浮點數加總順序與逐筆解析相同)。
+    """
+
+    def __init__(self):
+        self.amounts = {}
+        self._ordinals = {}
+
+    def add(self, date_str, category, amount):
+        ordinal = self._ordinals.get(date_str)
+        if ordinal is None:
+            ordinal = self._ordinals[date_str] = date_to_ordinal(date_str)
+        if ordinal:
+            key = (ordinal, category)
+            amounts = self.amounts.get(key)
+            if amounts is None:
+                amounts = self.amounts[key] = array('d')
+            amounts.append(amount)
+
+
+def _parse_range(job):
+    """行程池的工作：解析 [start, stop) 之間的紀錄，回傳 (解析的位元組數, DetailStore, DayAmounts)。"""
+    path, start, stop, header = job
+    ledger = LedgerAggregator(path)
+    ledger._set_header(header)
+    ledger.date_index = DayAmounts()
+    ledger._offset = start
+    with open(path, 'rb') as f:
+        ledger._consume_blocks(f, stop)
+    return ledger._offset - start, ledger.category_data, ledger.date_index
@@ -0,0 +1,241 @@
+"""
+效能量測 (Opt-in instrumentation)：記錄熱點路徑的耗時直方圖與計數器。
+
+啟用方式 (預設停用)：
+    EXPENSES_PROFILE=1 python Visualization_module.py        # 或 python Visualization_module.py --profile
+    EXPENSES_PROFILE=cprofile python Visualization_module.py # 或 --profile=cprofile，另外為每次重新整理輸出 cProfile 檔
+    python Input_module.py --profile=cprofile                # 每批存檔 (BackgroundWriter._commit) 輸出 save-*.prof
+本模組只讀取環境變數；--profile 旗標由進入點 (Visualization_module 與 Input_module 的 __main__) 在匯入其他模組之前轉成 EXPENSES_PROFILE，
+匯入本模組的其他程式不會因為自己的命令列參數而啟用量測。
+
+啟用後每 EXPENSES_PROFILE_LOG_SECONDS 秒在 stderr 印出一行摘要，並把完整的直方圖寫到
+EXPENSES_PROFILE_DIR/profile-<pid>.json (結束時再寫一次)；cProfile 檔可用 python -m pstats 檢視。
+
+停用時 timed()/profiled() 直接回傳原函式、measure() 回傳空的 context manager、count() 立即返回，
+熱點路徑上沒有額外的包裝或計時成本。本模組只依賴標準函式庫。
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from itertools import count as _serial
+
+# --- 配置 (Configuration) ---
+
+def _profile_mode(mode):
+    """EXPENSES_PROFILE 的值 -> None (停用)、'stats' 或 'cprofile'。"""
+    if mode in ('', '0'):
+        return None
+    return 'cprofile' if mode == 'cprofile' else 'stats'
+
+
+# 在模組載入時決定 (各模組的 @timed 也在載入時套用)
+PROFILE_MODE = _profile_mode(os.environ.get('EXPENSES_PROFILE', ''))
+PROFILE_ENABLED = PROFILE_MODE is not None
+PROFILE_DIR = os.environ.get('EXPENSES_PROFILE_DIR', 'profiles')
+LOG_SECONDS = float(os.environ.get('EXPENSES_PROFILE_LOG_SECONDS', '10'))
+# 直方圖各桶的上界 (毫秒)，最後一桶收超過 10 秒的紀錄
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """固定桶界的耗時直方圖；百分位數以所在桶的上界估計。"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, q):
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'buckets_ms': dict(zip([str(b) for b in BUCKETS_MS] + ['inf'], self.buckets)),
+        }
+
+
+class Recorder:
+    """所有執行緒共用的耗時直方圖與計數器 (背景寫入執行緒也會記錄 save)。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.counters = {}
+        self.started = time.time()
+        self._logged = 0
+
+    def record(self, name, seconds):
+        with self.lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram()
+            histogram.add(seconds * 1000.0)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'mode': PROFILE_MODE,
+                'uptime_s': round(time.time() - self.started, 3),
+                'timings': {name: h.as_dict() for name, h in sorted(self.timings.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def summary(self):
+        """一行摘要；自上次呼叫後沒有新紀錄時回傳 None。"""
+        with self.lock:
+            total = sum(h.count for h in self.timings.values()) + sum(self.counters.values())
+            if total == self._logged:
+                return None
+            self._logged = total
+            parts = [f"{name} n={h.count} p50≤{h.percentile(0.5):.3g}ms p95≤{h.percentile(0.95):.3g}ms "
+                     f"max={h.max_ms:.3g}ms" for name, h in sorted(self.timings.items())]
+            parts += [f"{name}={value}" for name, value in sorted(self.counters.items())]
+        return '[profile] ' + ' | '.join(parts)
+
+    def dump(self, path=None):
+        """把目前的統計寫成 JSON (先寫暫存檔再取代，讀取端不會看到寫到一半的檔案)。"""
+        import json
+        path = path or os.path.join(PROFILE_DIR, f'profile-{os.getpid()}.json')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return path
+
+
+recorder = Recorder()
+
+
+# --- 量測介面 (停用時皆為空操作) ---
+
+def timed(name):
+    """裝飾器：記錄每次呼叫的耗時到 name 直方圖。停用時原封不動回傳函式。"""
+    def decorate(func):
+        if not PROFILE_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class _Measure:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        recorder.record(self.name, time.perf_counter() - self.start)
+
+
+_NULL_MEASURE = nullcontext()
+
+
+def measure(name):
+    """with measure('aggregate'): ... 記錄一段程式碼的耗時 (不方便拆成函式時使用)。"""
+    return _Measure(name) if PROFILE_ENABLED else _NULL_MEASURE
+
+
+def count(name, n=1):
+    if PROFILE_ENABLED:
+        recorder.count(name, n)
+
+
+_capture_lock = threading.Lock()
+_capture_serial = _serial(1)
+
+
+def profiled(name):
+    """
+    裝飾器：cprofile 模式下以 cProfile 擷取每次呼叫，輸出到 PROFILE_DIR/<name>-<pid>-<序號>.prof。
+    同一時間只擷取一個呼叫 (cProfile 不能巢狀)；其他模式原封不動回傳函式。
+    """
+    def decorate(func):
+        if PROFILE_MODE != 'cprofile':
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _capture_lock.acquire(blocking=False):
+                return func(*args, **kwargs)
+            try:
+                import cProfile
+                profiler = cProfile.Profile()
+                try:
+                    return profiler.runcall(func, *args, **kwargs)
+                finally:
+                    os.makedirs(PROFILE_DIR, exist_ok=True)
+                    profiler.dump_stats(os.path.join(
+                        PROFILE_DIR, f'{name}-{os.getpid()}-{next(_capture_serial):04d}.prof'))
+            finally:
+                _capture_lock.release()
+        return wrapper
+    return decorate
+
+
+# --- 定期輸出 ---
+
+def _report():
+    line = recorder.summary()
+    if line is None:
+        return
+    print(line, file=sys.stderr, flush=True)
+    try:
+        recorder.dump()
+    except OSError as e:
+        print(f"[profile] 無法寫入統計檔: {e}", file=sys.stderr, flush=True)
+
+
+def _report_loop():
+    while True:
+        time.sleep(LOG_SECONDS)
+        _report()
+
+
+if PROFILE_ENABLED:
+    threading.Thread(target=_report_loop, name='profile-log', daemon=True).start()
+    atexit.register(_report)
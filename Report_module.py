@@ -0,0 +1,238 @@
+"""
+無視窗報表 (Headless reports)：不開啟任何視窗，直接把帳本輸出成圓餅圖與明細表格。
+
+圖表以 Agg 繪製 (matplotlib.figure.Figure + FigureCanvasAgg，不經過 pyplot)，
+樣式與互動視窗相同 (Chart_module.draw_pie)。每個帳本輸出到自己的目錄：
+    chart.png / chart.svg   圓餅圖 (前 TOP_N 名 + 「其他」)
+    details.html            類別摘要與各類別明細
+    details.csv             category,date,amount,notes (依類別、日期由新到舊)
+
+多個帳本以行程池平行輸出：
+    python Report_module.py users/*/expenses.csv --out reports --workers 8
+    python Report_module.py expenses.db --backend sqlite --start 2024-01-01 --end 2024-12-31
+"""
+import argparse
+import csv
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from Chart_module import (CHART_TITLE, CategoryPalette, CategoryRanking, category_color,
+                          configure_fonts, draw_empty, draw_pie, set_chart_title)
+from Ledger_module import sort_items
+from Storage_module import DATE_FORMAT, ENCODING, date_to_ordinal, open_ledger
+
+# --- 配置 (Configuration) ---
+TOP_N = 8
+CHART_FORMATS = ('png', 'svg')
+TABLE_FORMATS = ('html', 'csv')
+FIGSIZE = (8, 6)
+DPI = 100
+
+
+class ReportError(Exception):
+    """帳本無法讀取 (不存在或格式錯誤)。"""
+
+
+def _totals(ledger, date_range):
+    if date_range is None:
+        return ledger.category_totals
+    start, end = date_range
+    return ledger.range_totals(start, end)
+
+
+def render_chart(totals, paths, title=CHART_TITLE, top_n=TOP_N, palette=None):
+    """把類別總計畫成圓餅圖並存成 paths 中的每個檔案 (格式由副檔名決定)。"""
+    palette = palette or CategoryPalette()
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=FIGSIZE, dpi=DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    categories, sizes, folded = CategoryRanking(totals).level(0, top_n)
+    if sizes:
+        draw_pie(ax, categories, sizes, folded, palette.pie_colors(categories, folded))
+        set_chart_title(ax, title)
+    else:
+        draw_empty(ax, "此區間沒有支出")
+        ax.axis('off')
+    for path in paths:
+        fig.savefig(path)
+    return categories
+
+
+def _detail_rows(ledger, categories, date_range):
+    """逐類別產生 (category, 依日期由新到舊的明細)；日期比較方式與 range_totals 相同 (日期序數)。"""
+    if date_range is not None:
+        start, end = (d.toordinal() for d in date_range)
+    for category in categories:
+        items = sort_items(ledger.category_data.get(category, []))
+        if date_range is not None:
+            items = [item for item in items if start <= date_to_ordinal(item[0]) <= end]
+        yield category, items
+
+
+def write_csv(path, details):
+    with open(path, 'w', encoding=ENCODING, newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['category', 'date', 'amount', 'notes'])
+        for category, items in details:
+            writer.writerows((category, date, amount, note or '') for date, amount, note in items)
+
+
+def write_html(path, details, title, palette=None):
+    """類別的顏色與圓餅圖相同 (傳入 render_chart 用過的 palette)。"""
+    esc = html.escape
+    palette = palette or CategoryPalette()
+    sections = []
+    summary = []
+    for category, items in details:
+        color = category_color(palette.index(category))
+        total = sum(amount for _, amount, _ in items)
+        summary.append(f'<tr><td style="color:{color}">{esc(category)}</td>'
+                       f'<td class="amount">${int(total):,}</td><td>{len(items):,}</td></tr>')
+        rows = ''.join(f'<tr><td>{esc(date or "")}</td><td class="amount">${int(amount):,}</td>'
+                       f'<td>{esc(note or "")}</td></tr>' for date, amount, note in items)
+        sections.append(f'<h2 style="color:{color}">📂 {esc(category)} (總計: ${int(total):,})</h2>\n'
+                        f'<table><tr><th>日期</th><th>金額</th><th>備註</th></tr>{rows}</table>')
+    document = f"""<!DOCTYPE html>
+<html lang="zh-Hant"><head><meta charset="utf-8"><title>{esc(title)}</title>
+<style>
+body {{ font-family: "Microsoft JhengHei", sans-serif; margin: 2em; color: #333; }}
+table {{ border-collapse: collapse; margin-bottom: 2em; min-width: 40em; }}
+th {{ background: #EEEEEE; padding: 8px; }}
+td {{ padding: 8px 12px; border-bottom: 1px solid #DDD; }}
+tr:nth-child(even) td {{ background: #F9F9F9; }}
+td.amount {{ color: #E74C3C; font-weight: bold; text-align: right; }}
+</style></head><body>
+<h1>{esc(title)}</h1>
+<table><tr><th>類別</th><th>金額</th><th>筆數</th></tr>{''.join(summary)}</table>
+{chr(10).join(sections)}
+</body></html>
+"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(document)
+
+
+def render_report(ledger_path, out_dir, backend=None, date_range=None, charts=CHART_FORMATS,
+                  tables=TABLE_FORMATS, top_n=TOP_N):
+    """
+    讀取一個帳本並輸出圖表與明細表格到 out_dir，回傳輸出的檔案路徑清單。
+    date_range 為 (start, end) 的 date，None 代表全部歷史。帳本無法讀取時丟出 ReportError。
+    """
+    ledger = open_ledger(backend, ledger_path)
+    ledger.refresh()
+    if not ledger.valid:
+        raise ReportError(f"無法讀取帳本: {ledger_path}")
+    totals = _totals(ledger, date_range)
+
+    title = CHART_TITLE
+    if date_range is not None:
+        title += f"\n{date_range[0]:{DATE_FORMAT}} ~ {date_range[1]:{DATE_FORMAT}}"
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = [os.path.join(out_dir, f'chart.{fmt}') for fmt in charts]
+    palette = CategoryPalette()
+    render_chart(totals, outputs, title, top_n, palette)
+
+    # 明細表格列出所有類別 (不收合)，依金額由大到小
+    ranked = [category for category, _ in CategoryRanking(totals).ranked]
+    if 'csv' in tables:
+        outputs.append(os.path.join(out_dir, 'details.csv'))
+        write_csv(outputs[-1], _detail_rows(ledger, ranked, date_range))
+    if 'html' in tables:
+        outputs.append(os.path.join(out_dir, 'details.html'))
+        write_html(outputs[-1], list(_detail_rows(ledger, ranked, date_range)), title.replace('\n', ' '), palette)
+    return outputs
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    configure_fonts(matplotlib.rcParams)
+
+
+def _init_pool_worker():
+    _init_worker()
+    # 報表本身已經一個帳本一個行程：不要再為每個帳本各開一個平行載入的行程池 (行程數會變成 N × CPU 數)
+    import Ledger_module
+    Ledger_module.LOAD_WORKERS = 1
+
+
+def _render_job(job):
+    ledger_path, out_dir, options = job
+    try:
+        return ledger_path, render_report(ledger_path, out_dir, **options), None
+    except Exception as e:
+        # 單一帳本失敗不影響整批輸出
+        return ledger_path, [], f"{type(e).__name__}: {e}"
+
+
+def render_many(jobs, workers=None, **options):
+    """
+    以行程池平行輸出多個帳本，jobs 為 [(ledger_path, out_dir), ...]。
+    依 jobs 的順序逐一產生 (ledger_path, outputs, error)，成功時 error 為 None。
+    """
+    tasks = [(ledger_path, out_dir, options) for ledger_path, out_dir in jobs]
+    if workers == 1:
+        _init_worker()
+        yield from map(_render_job, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker) as pool:
+        yield from pool.map(_render_job, tasks)
+
+
+def output_dirs(ledger_paths, out_root):
+    """每個帳本一個輸出目錄：以上層目錄名稱 (users/alice/expenses.csv -> alice) 或檔名命名，重複時加上編號。"""
+    used = set()
+    dirs = []
+    for path in ledger_paths:
+        stem = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+        parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        name = parent if stem == 'expenses' and parent else stem
+        candidate, n = name, 1
+        while candidate in used:
+            n += 1
+            candidate = f"{name}-{n}"
+        used.add(candidate)
+        dirs.append(os.path.join(out_root, candidate))
+    return dirs
+
+
+def _parse_date(text):
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='將帳本輸出成圓餅圖 (PNG/SVG) 與明細表格 (HTML/CSV)')
+    parser.add_argument('ledgers', nargs='+')
+    parser.add_argument('--out', default='reports')
+    parser.add_argument('--backend', choices=('csv', 'columnar', 'sqlite'))
+    parser.add_argument('--charts', nargs='*', default=list(CHART_FORMATS), choices=CHART_FORMATS)
+    parser.add_argument('--tables', nargs='*', default=list(TABLE_FORMATS), choices=TABLE_FORMATS)
+    parser.add_argument('--start', type=_parse_date)
+    parser.add_argument('--end', type=_parse_date)
+    parser.add_argument('--top-n', type=int, default=TOP_N)
+    parser.add_argument('--workers', type=int, help='行程數 (預設為 CPU 數)')
+    args = parser.parse_args(argv)
+    if (args.start is None) != (args.end is None):
+        parser.error('--start 與 --end 需要同時指定')
+
+    date_range = (args.start, args.end) if args.start else None
+    jobs = list(zip(args.ledgers, output_dirs(args.ledgers, args.out)))
+    failed = 0
+    for ledger_path, outputs, error in render_many(jobs, args.workers, backend=args.backend,
+                                                   date_range=date_range, charts=args.charts,
+                                                   tables=args.tables, top_n=args.top_n):
+        if error:
+            failed += 1
+            print(f"✗ {ledger_path}: {error}")
+        else:
+            print(f"✓ {ledger_path} -> {os.path.dirname(outputs[0]) if outputs else args.out}")
+    print(f"完成 {len(jobs) - failed} 個帳本 (失敗 {failed} 個)，輸出目錄: {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
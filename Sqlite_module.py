@@ -0,0 +1,340 @@
+"""
+SQLite 儲存後端 (SQLite backend)。
+
+沿用 FIELDNAMES 的欄位 (date, amount, category, notes)，開啟 WAL 模式，
+並在 (category, date) 建立索引：儲存只需一次 INSERT，
+視覺化模組以 SUM(amount) GROUP BY category 與單一類別查詢取得資料，
+不必把整份帳本載入 Python。
+
+匯入 / 匯出 CSV：
+    python Sqlite_module.py import expenses.csv expenses.db
+    python Sqlite_module.py export expenses.db expenses.csv
+"""
+import argparse
+import csv
+import math
+import os
+import sqlite3
+from collections.abc import Mapping
+from datetime import date
+
+from Ledger_module import split_range
+from Storage_module import (DURABILITY, DURABILITY_LEVELS, ENCODING, FIELDNAMES, SQLITE_FILE,
+                            atomic_write, iter_csv_records, normalize_date)
+
+# --- 配置 (Configuration) ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id       INTEGER PRIMARY KEY,
+    date     TEXT,
+    amount   REAL NOT NULL,
+    category TEXT NOT NULL,
+    notes    TEXT
+);
+-- amount 放進索引，GROUP BY category 只需掃描索引 (covering index)
+CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses (category, date, amount);
+"""
+# 每日 / 每月的類別總計，由觸發器隨 INSERT / DELETE 增量維護，日期區間查詢只需讀取桶
+RANGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day      TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount   REAL NOT NULL,
+    PRIMARY KEY (day, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS monthly_totals (
+    month    TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount   REAL NOT NULL,
+    PRIMARY KEY (month, category)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS expenses_totals_insert AFTER INSERT ON expenses BEGIN
+    INSERT INTO daily_totals (day, category, amount) VALUES (NEW.date, NEW.category, NEW.amount)
+        ON CONFLICT (day, category) DO UPDATE SET amount = amount + excluded.amount;
+    INSERT INTO monthly_totals (month, category, amount) VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount)
+        ON CONFLICT (month, category) DO UPDATE SET amount = amount + excluded.amount;
+END;
+CREATE TRIGGER IF NOT EXISTS expenses_totals_delete AFTER DELETE ON expenses BEGIN
+    UPDATE daily_totals SET amount = amount - OLD.amount WHERE day = OLD.date AND category = OLD.category;
+    UPDATE monthly_totals SET amount = amount - OLD.amount
+        WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+END;
+"""
+# 舊版建立的資料庫沒有彙總表：第一次開啟時從 expenses 回填
+BACKFILL = """
+INSERT INTO daily_totals (day, category, amount)
+    SELECT date, category, SUM(amount) FROM expenses GROUP BY date, category;
+INSERT INTO monthly_totals (month, category, amount)
+    SELECT substr(date, 1, 7), category, SUM(amount) FROM expenses GROUP BY substr(date, 1, 7), category;
+"""
+# 耐久度對應的 PRAGMA synchronous (WAL 模式下 FULL 會在每次提交時 fsync WAL 檔)
+SYNCHRONOUS = {'none': 'OFF', 'fsync': 'FULL', 'full': 'EXTRA'}
+BUSY_TIMEOUT_MS = 5000
+IMPORT_BATCH_ROWS = 100_000
+
+
+def connect(path, durability=None, check_same_thread=True):
+    durability = durability or DURABILITY
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"未知的耐久度設定: {durability} (可用: {', '.join(DURABILITY_LEVELS)})")
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={SYNCHRONOUS[durability]}')
+    return conn
+
+
+class SqliteExpenseStore:
+    """SQLite 寫入端，介面與 CsvExpenseStore 相同。"""
+
+    def __init__(self, path=SQLITE_FILE, durability=None):
+        self.path = path
+        self.durability = durability or DURABILITY
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            # 連線可能在主執行緒建立、再交給 BackgroundWriter 的寫入執行緒使用 (同一時間只有一個執行緒)
+            conn = connect(self.path, self.durability, check_same_thread=False)
+            conn.executescript(SCHEMA)
+            has_totals = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_totals'").fetchone()
+            with conn:
+                conn.executescript(RANGE_SCHEMA)
+                if not has_totals:
+                    conn.executescript(BACKFILL)
+            self._conn = conn
+        return self._conn
+
+    def initialize(self):
+        created = not os.path.exists(self.path)
+        self._connection()
+        return created
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO expenses (date, amount, category, notes) VALUES (?, ?, ?, ?)',
+                ((normalize_date(r['date']), float(r['amount']), r['category'], r.get('notes') or '')
+                 for r in records),
+            )
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class SqliteDetails(Mapping):
+    """以類別為鍵的明細檢視；查詢單一類別時才透過 (category, date) 索引取資料。"""
+
+    def __init__(self, ledger):
+        self._ledger = ledger
+        self._cache = {}
+
+    def __getitem__(self, category):
+        ledger = self._ledger
+        if category not in ledger.category_totals:
+            raise KeyError(category)
+        cached = self._cache.get(category)
+        if cached is not None and cached[0] == ledger.version:
+            return cached[1]
+        items = ledger.query(
+            'SELECT date, amount, notes FROM expenses WHERE category = ? ORDER BY date, id',
+            (category,))
+        self._cache[category] = (ledger.version, items)
+        return items
+
+    def __iter__(self):
+        return iter(self._ledger.category_totals)
+
+    def __len__(self):
+        return len(self._ledger.category_totals)
+
+
+class SqliteLedger:
+    """
+    SQLite 讀取端，介面與 LedgerAggregator 相同。
+    以 PRAGMA data_version 判斷其他連線是否提交過資料，有變化才重新彙總。
+    """
+
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        # WAL 模式下提交只會寫入 -wal 檔
+        self.watch_path = path + '-wal'
+        self._conn = None
+        self.reset()
+
+    def reset(self):
+        self.deltas = None
+        self.valid = False
+        self.version = None
+        self._last_id = 0
+        self.category_totals = {}
+        self.category_data = SqliteDetails(self)
+
+    def query(self, sql, params=()):
+        return self._conn.execute(sql, params).fetchall()
+
+    def refresh(self):
+        if not os.path.exists(self.path):
+            changed = self.valid
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.reset()
+            return changed
+        try:
+            if self._conn is None:
+                # 第一次讀取可能在背景執行緒進行 (視覺化模組啟動時)，之後由主執行緒使用
+                self._conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True,
+                                             timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+            version = (self._conn.execute('PRAGMA data_version').fetchone()[0],
+                       self._conn.execute('PRAGMA schema_version').fetchone()[0])
+            if version == self.version:
+                self.deltas = {}
+                return False
+            previous_totals = self.category_totals
+            self.category_totals = dict(self.query(
+                'SELECT category, SUM(amount) FROM expenses '
+                "WHERE category != '' GROUP BY category"))
+            self._update_deltas(previous_totals)
+        except sqlite3.Error:
+            changed = self.valid
+            self.reset()
+            return changed
+        self.version = version
+        self.valid = True
+        return True
+
+    def range_totals(self, start=None, end=None):
+        """
+        指定日期區間 (date，None 代表不限) 的類別總計：
+        區間拆成零散日期與完整月份，分別讀取 daily_totals / monthly_totals 的桶。
+        """
+        if not self.valid:
+            return {}
+        try:
+            if start is None or end is None:
+                first, last = self.query('SELECT MIN(day), MAX(day) FROM daily_totals')[0]
+                if first is None:
+                    return {}
+                start = start or date.fromisoformat(first)
+                end = end or date.fromisoformat(last)
+        except (sqlite3.OperationalError, ValueError):
+            # 舊版資料庫 (尚未被新版寫入端開啟過) 沒有彙總表，直接查詢 expenses
+            return dict(self.query(
+                'SELECT category, SUM(amount) FROM expenses '
+                "WHERE category != '' AND date BETWEEN ? AND ? GROUP BY category",
+                ((start or date.min).isoformat(), (end or date.max).isoformat())))
+
+        days, months = split_range(start, end)
+        parts, params = [], []
+        for first, last in days:
+            parts.append('SELECT category, amount FROM daily_totals WHERE day BETWEEN ? AND ?')
+            params += [first.isoformat(), last.isoformat()]
+        if months:
+            parts.append('SELECT category, amount FROM monthly_totals WHERE month BETWEEN ? AND ?')
+            params += [f'{m // 12:04d}-{m % 12 + 1:02d}' for m in months]
+        if not parts:
+            return {}
+        return dict(self.query(
+            f"SELECT category, SUM(amount) FROM ({' UNION ALL '.join(parts)}) "
+            "WHERE category != '' GROUP BY category", params))
+
+    def _update_deltas(self, previous_totals):
+        """
+        以 id 大於上次最大值的列作為新增明細。
+        若某類別的新總計與「舊總計 + 新增金額」不符 (有列被刪除或修改)，
+        該類別的 delta 記為 None，明細視窗會整份重新載入。
+        """
+        last_id = self._last_id
+        max_id = self.query('SELECT MAX(id) FROM expenses')[0][0] or 0
+        self._last_id = max_id
+        if not self.valid or max_id < last_id:
+            self.deltas = None
+            return
+        deltas = {}
+        for day, amount, category, notes in self.query(
+                'SELECT date, amount, category, notes FROM expenses WHERE id > ? ORDER BY id', (last_id,)):
+            if category:
+                deltas.setdefault(category, []).append((day, amount, notes))
+        for category in set(previous_totals) | set(self.category_totals):
+            expected = previous_totals.get(category, 0.0)
+            if category in deltas:
+                expected += sum(amount for _, amount, _ in deltas[category])
+            if not math.isclose(expected, self.category_totals.get(category, 0.0), rel_tol=1e-9, abs_tol=1e-6):
+                deltas[category] = None
+        self.deltas = deltas
+
+
+# --- CSV 匯入 / 匯出 (CSV import / export) ---
+
+def import_csv(csv_path, db_path=SQLITE_FILE):
+    """將 CSV 帳本匯入 SQLite，回傳 (匯入列數, 略過列數)；略過規則與視覺化模組相同。"""
+    store = SqliteExpenseStore(db_path, durability='none')
+    imported = skipped = 0
+    batch = []
+    for record in iter_csv_records(csv_path):
+        if record is None:
+            skipped += 1
+            continue
+        batch.append(record)
+        if len(batch) >= IMPORT_BATCH_ROWS:
+            store.append_many(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        store.append_many(batch)
+        imported += len(batch)
+    store.close()
+    return imported, skipped
+
+
+def export_csv(db_path, csv_path):
+    """
+    依寫入順序把 SQLite 帳本匯出成與 Input_module 相容的 CSV，回傳匯出列數。
+    以暫存檔 + rename 發布，正在讀取 csv_path 的程式不會讀到寫到一半的檔案。
+    """
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    exported = 0
+    try:
+        cursor = conn.execute('SELECT date, amount, category, notes FROM expenses ORDER BY id')
+        with atomic_write(csv_path, 'w', encoding=ENCODING, newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(FIELDNAMES)
+            while True:
+                rows = cursor.fetchmany(IMPORT_BATCH_ROWS)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                exported += len(rows)
+    finally:
+        conn.close()
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SQLite 帳本與 CSV 之間的匯入 / 匯出')
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='CSV -> SQLite')
+    import_parser.add_argument('csv_path')
+    import_parser.add_argument('db_path', nargs='?', default=SQLITE_FILE)
+    export_parser = commands.add_parser('export', help='SQLite -> CSV')
+    export_parser.add_argument('db_path')
+    export_parser.add_argument('csv_path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        imported, skipped = import_csv(args.csv_path, args.db_path)
+        print(f"已匯入 {imported} 筆紀錄到 {args.db_path} (略過 {skipped} 筆無效紀錄)")
+    else:
+        exported = export_csv(args.db_path, args.csv_path)
+        print(f"已匯出 {exported} 筆紀錄到 {args.csv_path}")
+
+
+if __name__ == '__main__':
+    main()
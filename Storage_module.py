@@ -0,0 +1,369 @@
+import csv
+import io
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from Profile_module import count, profiled, timed
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# --- 配置 (Configuration) ---
+DATA_FILE = 'expenses.csv'
+LEDGER_DIR = 'expenses.ledger'
+SQLITE_FILE = 'expenses.db'
+FIELDNAMES = ['date', 'amount', 'category', 'notes']
+DATE_FORMAT = '%Y-%m-%d'
+ENCODING = 'utf_8_sig'
+BOM = b'\xef\xbb\xbf'
+
+# 寫入耐久度 (Durability):
+#   'none'  : 只寫入作業系統緩衝區 (與舊版 pandas.to_csv 行為相同)
+#   'fsync' : 每次寫入後 fsync 資料檔
+#   'full'  : fsync 資料檔，新建檔案時再 fsync 所在目錄
+DURABILITY_LEVELS = ('none', 'fsync', 'full')
+DURABILITY = os.environ.get('EXPENSES_DURABILITY', 'fsync')
+
+# 儲存後端 (Storage backend):
+#   'csv'      : expenses.csv (預設，與舊版相容)
+#   'columnar' : expenses.ledger/ 欄式二進位格式，視覺化模組以 mmap 讀取
+#   'sqlite'   : expenses.db (WAL 模式，彙總與明細查詢交給 SQLite)
+STORAGE_BACKEND = os.environ.get('EXPENSES_BACKEND', 'csv')
+BACKEND_PATHS = {'csv': DATA_FILE, 'columnar': LEDGER_DIR, 'sqlite': SQLITE_FILE}
+
+# 寫入鎖 (Writer lock)：多個輸入程式同時寫入時，以帳本旁的 <帳本>.lock 檔互斥
+LOCK_SUFFIX = '.lock'
+
+# 背景寫入 (Background writer)：佇列上限 (滿了時儲存會等待) 與每次合併寫入的最大筆數
+WRITE_QUEUE_SIZE = int(os.environ.get('EXPENSES_WRITE_QUEUE_SIZE', '1024'))
+GROUP_COMMIT_ROWS = 256
+
+
+def _fsync_directory(path):
+    """fsync 檔案所在目錄，讓新建檔案的目錄項目也落盤 (Windows 不支援，略過)。"""
+    if os.name == 'nt':
+        return
+    dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class WriterLock:
+    """
+    跨行程的寫入端互斥鎖 (advisory lock)，鎖在 path + LOCK_SUFFIX 這個旁檔上。
+    只有寫入端取鎖；讀取端 (視覺化模組) 只讀取已完整寫入的紀錄，從不等待寫入端。
+    每次進入都重新開檔，因此同一行程的不同執行緒之間也互斥。
+    """
+
+    def __init__(self, path):
+        self.path = path + LOCK_SUFFIX
+        self._fd = None
+
+    def __enter__(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        # LK_LOCK 重試約 10 秒仍失敗時丟出 OSError，繼續等待
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode='wb', durability=None, **open_kwargs):
+    """
+    整份檔案的原子發布：先寫到同目錄的暫存檔，完成後以 os.replace 取代目標檔。
+    讀取端只會看到舊檔或完整的新檔；寫入失敗時目標檔不受影響。
+    """
+    durability = durability or DURABILITY
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, mode, **open_kwargs) as f:
+            yield f
+            f.flush()
+            if durability != 'none':
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if durability == 'full':
+        _fsync_directory(path)
+
+
+def date_to_ordinal(date_str):
+    """將日期字串轉成整數序數 (date.toordinal)；無法解析時回傳 0。"""
+    try:
+        return date.fromisoformat(date_str).toordinal()
+    except (TypeError, ValueError):
+        try:
+            return datetime.strptime(date_str, DATE_FORMAT).toordinal()
+        except (TypeError, ValueError):
+            return 0
+
+
+def ordinal_to_date(ordinal):
+    return date.fromordinal(ordinal).isoformat() if ordinal > 0 else ''
+
+
+def normalize_date(date_str):
+    """把可解析的日期統一成 YYYY-MM-DD (例如 2024-1-5 -> 2024-01-05)，其餘原樣保留。"""
+    ordinal = date_to_ordinal(date_str)
+    return ordinal_to_date(ordinal) if ordinal else date_str
+
+
+def iter_csv_records(path):
+    """
+    串流讀取 CSV 帳本，逐列產生紀錄 dict；
+    視覺化模組會略過的列 (金額無法解析、類別為空、欄位錯位) 產生 None。
+    """
+    with open(path, encoding=ENCODING, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                row_lower = {k.lower(): v for k, v in row.items()}
+                record = {
+                    'date': row_lower['date'],
+                    'amount': float(row_lower['amount']),
+                    'category': row_lower['category'],
+                    'notes': row_lower.get('notes') or '',
+                }
+            except (AttributeError, KeyError, TypeError, ValueError):
+                yield None
+                continue
+            yield record if record['category'] else None
+
+
+def encode_records(records, fieldnames=FIELDNAMES):
+    """將多筆紀錄編碼成 CSV 位元組 (不含 BOM 與表頭)。"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator='\n')
+    writer.writerows(records)
+    return buffer.getvalue().encode('utf-8')
+
+
+def encode_header(fieldnames=FIELDNAMES):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerow(fieldnames)
+    return buffer.getvalue().encode('utf-8')
+
+
+class CsvExpenseStore:
+    """
+    只追加 (append-only) 的 CSV 儲存層。
+    每次儲存只在檔尾寫入新的紀錄，成本與帳本大小無關 (O(1))。
+    """
+
+    def __init__(self, path=DATA_FILE, durability=None, fieldnames=FIELDNAMES):
+        durability = durability or DURABILITY
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"未知的耐久度設定: {durability} (可用: {', '.join(DURABILITY_LEVELS)})")
+        self.path = path
+        self.durability = durability
+        self.fieldnames = list(fieldnames)
+
+    def initialize(self):
+        """檔案不存在時建立檔案並寫入表頭，回傳是否為新建。"""
+        if os.path.exists(self.path):
+            return False
+        self.append_many([])
+        return True
+
+    def _existing_fieldnames(self, f):
+        """讀取既有表頭；表頭缺少必要欄位時沿用預設欄位順序。"""
+        f.seek(0)
+        first_line = f.readline()
+        if first_line.startswith(BOM):
+            first_line = first_line[len(BOM):]
+        header = next(csv.reader([first_line.decode('utf-8', errors='replace')]), [])
+        header = [h.strip().lower() for h in header]
+        if sorted(header) != sorted(self.fieldnames):
+            return self.fieldnames
+        return header
+
+    def append(self, record):
+        """追加一筆紀錄 (dict)。"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """
+        以單次寫入追加多筆紀錄；新檔案或空檔案會先補上 BOM 與表頭。
+        持有寫入鎖期間才檢查表頭與檔尾，多個寫入者不會重複寫表頭或互相穿插。
+        """
+        payload = encode_records(records, self.fieldnames)
+        with WriterLock(self.path):
+            self._append_locked(records, payload)
+
+    def _append_locked(self, records, payload):
+        created = not os.path.exists(self.path)
+
+        # 'ab+' 模式：寫入永遠落在檔尾，同時允許讀取最後幾個位元組
+        with open(self.path, 'ab+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            prefix = b''
+            if size <= len(BOM):
+                # 新檔或只有 BOM 的檔案：需要表頭
+                f.seek(0)
+                existing = f.read()
+                if not existing:
+                    prefix += BOM
+                elif existing != BOM:
+                    prefix += b'\n'
+                prefix += encode_header(self.fieldnames)
+            else:
+                # 既有檔案的欄位順序可能不同 (例如手動編輯過)，依表頭順序寫入
+                fieldnames = self._existing_fieldnames(f)
+                if fieldnames != self.fieldnames:
+                    payload = encode_records(records, fieldnames)
+                # 上一筆紀錄沒有換行結尾時補上換行，避免黏在同一行
+                f.seek(size - 1)
+                if f.read(1) not in (b'\n', b'\r'):
+                    prefix += b'\n'
+
+            f.write(prefix + payload)
+            f.flush()
+            if self.durability != 'none':
+                os.fsync(f.fileno())
+
+        if created and self.durability == 'full':
+            _fsync_directory(self.path)
+
+
+# --- 背景寫入 (Background writer) ---
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    在背景執行緒寫入 store，呼叫端 (Tk 主執行緒) 只把紀錄放進有界佇列就立即返回。
+    寫入執行緒每次取出佇列中已累積的所有紀錄，合併成一次 append_many (group commit)：
+    短時間內連續儲存只需要一次寫入與一次 fsync。
+    """
+
+    def __init__(self, store, maxsize=WRITE_QUEUE_SIZE, max_batch=GROUP_COMMIT_ROWS):
+        self.store = store
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, name='expenses-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, record, callback=None):
+        """
+        排入一筆紀錄；佇列已滿時等待 (背壓)。
+        寫入 (含 fsync) 完成後在寫入執行緒呼叫 callback(error)，成功時 error 為 None。
+        """
+        self._queue.put((record, callback))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    @profiled('save')
+    @timed('save')
+    def _commit(self, batch):
+        count('save.rows', len(batch))
+        error = None
+        try:
+            self.store.append_many([record for record, _ in batch])
+        except Exception as e:
+            error = e
+        for _, callback in batch:
+            if callback is not None:
+                callback(error)
+
+    def stop(self):
+        """要求寫入執行緒在寫完佇列中既有的紀錄後結束 (不等待)。"""
+        self._queue.put(_STOP)
+
+    def join(self, timeout=None):
+        """等待寫入執行緒結束，回傳是否已結束。"""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def close(self):
+        """寫完 (flush) 佇列中所有紀錄後結束。"""
+        self.stop()
+        self.join()
+
+
+# --- 後端選擇 (Backend selection) ---
+
+def _backend(backend):
+    backend = backend or STORAGE_BACKEND
+    if backend not in BACKEND_PATHS:
+        raise ValueError(f"未知的儲存後端: {backend} (可用: {', '.join(BACKEND_PATHS)})")
+    return backend
+
+
+def open_store(backend=None, path=None, durability=None):
+    """依設定建立寫入端 (append / append_many / initialize)。"""
+    backend = _backend(backend)
+    path = path or BACKEND_PATHS[backend]
+    if backend == 'columnar':
+        from Columnar_module import ColumnarExpenseStore
+        return ColumnarExpenseStore(path, durability=durability)
+    if backend == 'sqlite':
+        from Sqlite_module import SqliteExpenseStore
+        return SqliteExpenseStore(path, durability=durability)
+    return CsvExpenseStore(path, durability=durability)
+
+
+def open_ledger(backend=None, path=None):
+    """依設定建立讀取端 (refresh / valid / category_totals / category_data)。"""
+    backend = _backend(backend)
+    path = path or BACKEND_PATHS[backend]
+    if backend == 'columnar':
+        from Columnar_module import ColumnarLedger
+        return ColumnarLedger(path)
+    if backend == 'sqlite':
+        from Sqlite_module import SqliteLedger
+        return SqliteLedger(path)
+    from Ledger_module import LedgerAggregator
+    return LedgerAggregator(path)
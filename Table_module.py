@@ -0,0 +1,211 @@
+import tkinter as tk
+from tkinter import ttk
+
+from Ledger_module import sort_items
+
+# --- 表格樣式 (Table style) ---
+FONT_NAME = "Microsoft JhengHei"
+DATE_WIDTH = 150
+AMOUNT_WIDTH = 120
+NOTE_PADX = 20
+ROW_PADY = 15
+HEADER_BG = "#EEEEEE"
+EVEN_BG = "#F9F9F9"
+ODD_BG = "white"
+# 每次滾輪捲動的列數
+WHEEL_ROWS = 3
+
+
+class _TableRow:
+    """一列可重複使用的元件：捲動時只更換文字與底色，不重新建立。"""
+
+    def __init__(self, parent):
+        self.frame = tk.Frame(parent, pady=ROW_PADY)
+        self.frame.grid_columnconfigure(0, minsize=DATE_WIDTH)
+        self.frame.grid_columnconfigure(1, minsize=AMOUNT_WIDTH)
+        self.frame.grid_columnconfigure(2, weight=1) # 關鍵：備註欄位佔滿剩餘空間
+
+        self.date_label = tk.Label(self.frame, font=(FONT_NAME, 14), anchor="center")
+        self.date_label.grid(row=0, column=0, sticky="ew")
+        self.amount_label = tk.Label(self.frame, font=(FONT_NAME, 14, "bold"), fg="#E74C3C",
+                                     anchor="center")
+        self.amount_label.grid(row=0, column=1, sticky="ew")
+        self.note_label = tk.Label(self.frame, font=(FONT_NAME, 14), anchor="w", justify="left")
+        self.note_label.grid(row=0, column=2, sticky="ew", padx=NOTE_PADX)
+        self.separator = ttk.Separator(parent, orient='horizontal')
+        self.shown = False
+
+    def fill(self, index, item, wraplength):
+        date, amt, note = item
+        bg_color = EVEN_BG if index % 2 == 0 else ODD_BG
+        self.frame.configure(bg=bg_color)
+        self.date_label.configure(text=date, bg=bg_color)
+        self.amount_label.configure(text=f"${int(amt):,}", bg=bg_color)
+        self.note_label.configure(text=note, bg=bg_color, wraplength=wraplength)
+
+    def show(self):
+        if not self.shown:
+            self.frame.pack(fill=tk.X)
+            self.separator.pack(fill='x')
+            self.shown = True
+
+    def hide(self):
+        if self.shown:
+            self.frame.pack_forget()
+            self.separator.pack_forget()
+            self.shown = False
+
+
+class VirtualTable:
+    """
+    虛擬化明細表格：只建立可視範圍內的列，捲動時重複使用同一批元件。
+    開啟時間與記憶體只和視窗高度有關，與資料筆數無關。
+    捲軸以「列」為單位 (第一個可見列 / 總列數)，因此各列高度可以不同 (備註自動換行)。
+    """
+
+    def __init__(self, parent):
+        self.items = []
+        self.first = 0
+        self.visible = 0
+        self._rows = []
+        self._wraplength = 0
+        self._render_job = None
+
+        # --- 表頭 ---
+        # 使用 Grid 排版，確保對齊
+        header_row = tk.Frame(parent, bg=HEADER_BG, pady=10)
+        header_row.pack(fill=tk.X, padx=20)
+        header_row.grid_columnconfigure(0, minsize=DATE_WIDTH) # 日期
+        header_row.grid_columnconfigure(1, minsize=AMOUNT_WIDTH) # 金額
+        header_row.grid_columnconfigure(2, weight=1)    # 備註 (伸縮)
+        tk.Label(header_row, text="日期", font=(FONT_NAME, 14, "bold"),
+                 bg=HEADER_BG, anchor="center").grid(row=0, column=0, sticky="ew")
+        tk.Label(header_row, text="金額", font=(FONT_NAME, 14, "bold"),
+                 bg=HEADER_BG, anchor="center").grid(row=0, column=1, sticky="ew")
+        tk.Label(header_row, text="備註", font=(FONT_NAME, 14, "bold"),
+                 bg=HEADER_BG, anchor="w").grid(row=0, column=2, sticky="ew", padx=NOTE_PADX)
+
+        # --- 可捲動內容區 ---
+        container = tk.Frame(parent, bg="white")
+        container.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
+        self.scrollbar = tk.Scrollbar(container, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = tk.Frame(container, bg="white")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.pack_propagate(False)
+
+        # 備註欄位的換行寬度跟著視窗寬度走 (智慧換行)，整個表格只需要一個 <Configure>
+        self.body.bind("<Configure>", self._on_configure)
+        toplevel = parent.winfo_toplevel()
+        toplevel.bind("<MouseWheel>", lambda e: self.scroll(int(-1*(e.delta/120)) * WHEEL_ROWS), add="+")
+        toplevel.bind("<Button-4>", lambda e: self.scroll(-WHEEL_ROWS), add="+")
+        toplevel.bind("<Button-5>", lambda e: self.scroll(WHEEL_ROWS), add="+")
+
+    # --- 資料 ---
+
+    def set_items(self, items, presorted=False):
+        """
+        更換整份資料 (依日期由新到舊顯示)，保留目前捲動位置。
+        資料層的 SortedRows 已經排好，直接分頁顯示 (只組出可視範圍內的列)，不複製也不重新排序。
+        """
+        self.items = items if presorted else sort_items(items)
+        self.first = min(self.first, max(0, len(self.items) - 1))
+        self.render()
+
+    def _date_range(self, date):
+        """回傳日期等於 date 的列所在的 [start, end) 範圍 (items 依日期由新到舊)。"""
+        key = date or ''
+        lo, hi = 0, len(self.items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (self.items[mid][0] or '') > key:
+                lo = mid + 1
+            else:
+                hi = mid
+        start, hi = lo, len(self.items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (self.items[mid][0] or '') >= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return start, lo
+
+    def apply_delta(self, inserted):
+        """
+        就地修補個別的列：依日期插入 inserted (同日期排在既有紀錄之後)。
+        只有變動落在可視範圍之內或之前時才重繪，否則只更新捲軸。
+        目前顯示的是唯讀的檢視 (SortedRows) 時先複製成 list 再修補。
+        """
+        if not isinstance(self.items, list):
+            self.items = list(self.items)
+        touched = len(self.items)
+        for item in inserted:
+            _, index = self._date_range(item[0])
+            self.items.insert(index, item)
+            touched = min(touched, index)
+
+        if touched < self.first + max(1, self.visible):
+            self.render()
+        else:
+            self._update_scrollbar()
+
+    # --- 捲動 ---
+
+    def yview(self, *args):
+        """Scrollbar 的 command：支援 moveto 與 scroll (units / pages)。"""
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.items))
+            self.render()
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= max(1, self.visible - 1)
+            self.scroll(step)
+
+    def scroll(self, rows):
+        self.first += rows
+        self.render()
+
+    # --- 繪製 ---
+
+    def _on_configure(self, event):
+        # 同舊版：換行點設為「備註欄寬度 - 10px」
+        self._wraplength = max(1, event.width - DATE_WIDTH - AMOUNT_WIDTH - NOTE_PADX * 2 - 10)
+        self.render()
+
+    def render(self):
+        """合併同一輪事件中的多次重繪要求。"""
+        if self._render_job is None:
+            self._render_job = self.body.after_idle(self._render)
+
+    def _render(self):
+        self._render_job = None
+        total = len(self.items)
+        self.first = max(0, min(self.first, total - max(1, self.visible)))
+        height = self.body.winfo_height()
+
+        used = 0
+        count = 0
+        while self.first + count < total and used < height:
+            if count == len(self._rows):
+                self._rows.append(_TableRow(self.body))
+            row = self._rows[count]
+            index = self.first + count
+            row.fill(index, self.items[index], self._wraplength)
+            row.show()
+            row.frame.update_idletasks()
+            used += row.frame.winfo_reqheight() + row.separator.winfo_reqheight()
+            count += 1
+
+        for row in self._rows[count:]:
+            row.hide()
+        self.visible = count
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.items)
+        if total:
+            self.scrollbar.set(self.first / total, min(1, (self.first + self.visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
@@ -1,316 +1,581 @@
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-import matplotlib.colors as mcolors
-import matplotlib.patheffects as path_effects
-import csv
+# matplotlib 與明細表格模組在用到時才載入 (見 __main__ 的啟動流程)，模組本身只依賴標準函式庫
+import importlib
 import os
+import sys
+import threading
 import tkinter as tk
+from datetime import date, datetime, timedelta
 from tkinter import messagebox
-from tkinter import ttk
-from collections import defaultdict
+
+if __name__ == "__main__":
+    # 命令列的 --profile[=cprofile] 轉成 EXPENSES_PROFILE：量測模組在匯入時讀取，必須在匯入其他模組之前設定
+    for _arg in sys.argv[1:]:
+        if _arg == '--profile' or _arg.startswith('--profile='):
+            os.environ['EXPENSES_PROFILE'] = _arg.partition('=')[2] or os.environ.get('EXPENSES_PROFILE') or '1'
+    sys.argv[1:] = [_arg for _arg in sys.argv[1:] if _arg != '--profile' and not _arg.startswith('--profile=')]
+
+from Chart_module import (CHART_TITLE, OTHER_LABEL, BlitHighlighter, CategoryPalette, CategoryRanking,
+                          PieChart, WedgeHitTester, category_color, configure_fonts, draw_empty,
+                          set_chart_title)
+from Profile_module import PROFILE_ENABLED, count, measure, profiled, timed
+from Storage_module import BACKEND_PATHS, STORAGE_BACKEND, date_to_ordinal, open_ledger
+from Watcher_module import POLL_MIN_MS, StatPollingWatcher, TkFileWatch
 
 # --- 檔案設定 ---
 DATA_FILE = 'expenses.csv'
 
-# 全域變數
-current_wedges = []
-current_texts = []
-current_autotexts = []
-current_labels = []
-current_details = {}
-last_modified_time = 0
-hovered_index = -1
-opened_windows = {} 
-
-# --- 客製化顏色順序 ---
-CUSTOM_COLORS = [
-    '#F48FB1', '#CE93D8', '#9FA8DA', '#90CAF9', '#A5D6A7', 
-    '#FFF59D', '#FFCC80', '#EF9A9A', '#BCAAA4'
-]
-
-def darken_color(hex_color, factor=0.6):
-    try:
-        rgb = mcolors.hex2color(hex_color)
-        darker_rgb = [x * factor for x in rgb]
-        return darker_rgb
-    except:
-        return 'black'
-
-def get_expenses_data():
-    global last_modified_time
-    if not os.path.exists(DATA_FILE): return None, None
+# --- 啟動設定 ---
+# 啟動畫面顯示期間在背景執行緒載入的模組
+PRELOAD_MODULES = ('matplotlib.pyplot', 'matplotlib.patheffects', 'matplotlib.widgets')
+SPLASH_POLL_SECONDS = 0.02
+# benchmarks/bench_startup.py 設定此變數：第一個視窗出現與圖表第一次畫完時各印出一行，之後結束
+STARTUP_PROBE = os.environ.get('EXPENSES_STARTUP_PROBE')
+
+# 類別很多時只顯示前 TOP_N 名，其餘收進「其他」扇形 (可點擊鑽取)
+TOP_N = 8
+
+# --- 日期區間選項 ---
+RANGE_OPTIONS = ['全部', '本月', '近 90 天', '自訂']
+DATE_FORMAT = '%Y-%m-%d'
+
+
+# --- 資料模型 (Data model) ---
+
+def in_range(items, date_range):
+    """只留下日期落在 date_range (含頭尾) 之內的明細列，順序不變。"""
+    start, end = (d.toordinal() for d in date_range)
+    return [item for item in items if start <= date_to_ordinal(item[0]) <= end]
+
+
+class LedgerModel:
+    """
+    一個帳本的解析結果、檔案監看與類別配色，由所有顯示這個帳本的儀表板共用：
+    檔案變更時只重新讀取一次，再依序通知每個儀表板重畫；同一個類別在每個儀表板都是同一個顏色。
+    """
+
+    def __init__(self, path=None, backend=None):
+        self.backend = backend or STORAGE_BACKEND
+        self.path = path or BACKEND_PATHS[self.backend]
+        self.ledger = open_ledger(self.backend, self.path)
+        self.palette = CategoryPalette()
+        self.views = []
+        self.refs = 0
+        self._watch = None
+        self._watch_owner = None
+
+    @property
+    def valid(self):
+        return self.ledger.valid
+
+    @property
+    def category_totals(self):
+        return self.ledger.category_totals
+
+    @property
+    def category_data(self):
+        return self.ledger.category_data
+
+    @property
+    def deltas(self):
+        return self.ledger.deltas
+
+    def range_totals(self, date_range):
+        """日期區間的類別總計：全部歷史直接用累計值，其他區間查詢日期索引的桶。"""
+        if date_range is None:
+            return self.ledger.category_totals
+        return self.ledger.range_totals(*date_range)
+
+    def range_details(self, category, date_range):
+        """
+        日期區間內的類別明細 (依日期由新到舊)；日期比較方式與 range_totals 相同 (日期序數)。
+        全部歷史直接回傳資料層的明細 (SortedRows 為唯讀的即時檢視，不複製)。
+        """
+        items = self.ledger.category_data.get(category, [])
+        if date_range is None:
+            return items
+        return in_range(items, date_range)
+
+    @profiled('refresh')
+    def refresh(self):
+        """只解析帳本新增的尾端，回傳是否有變化；有變化且帳本有效時通知所有儀表板。"""
+        with measure('load'):
+            changed = self.ledger.refresh()
+        if changed and self.ledger.valid:
+            count('refresh.views', len(self.views))
+            for view in list(self.views):
+                view.show_ledger()
+        return changed
+
+    def attach(self, view):
+        self.views.append(view)
+        if self._watch is None:
+            self._start_watch(view)
+
+    def detach(self, view):
+        if view in self.views:
+            self.views.remove(view)
+        if view is self._watch_owner:
+            # 監看掛在這個儀表板的視窗上：改掛到其他仍開啟的儀表板
+            self._stop_watch()
+            if self.views:
+                self._start_watch(self.views[0])
+
+    def _start_watch(self, view):
+        self._watch = view.start_file_watch(self.ledger.watch_path, self.refresh)
+        self._watch_owner = view
+
+    def _stop_watch(self):
+        if self._watch is not None:
+            self._watch.stop()
+        self._watch = self._watch_owner = None
+
+    def close(self):
+        self._stop_watch()
+        self.views = []
+
+
+def file_identity(path):
+    """以 (st_dev, st_ino) 辨識檔案，同一個帳本的不同路徑 (相對路徑、符號連結) 會得到相同結果。"""
     try:
-        file_mtime = os.path.getmtime(DATA_FILE)
-        if file_mtime == last_modified_time: return "NO_CHANGE", "NO_CHANGE"
-        last_modified_time = file_mtime
-    except OSError: return None, None
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class LedgerCache:
+    """
+    以檔案身分為鍵的 LedgerModel 快取 (參考計數)：
+    同一個帳本不論開了幾個儀表板都只解析、只監看一次，最後一個使用者釋放時才移除。
+    """
+
+    def __init__(self):
+        self._by_identity = {}
+        self._by_path = {}
+
+    def __len__(self):
+        return len({id(model) for model in self._by_path.values()})
+
+    def acquire(self, path=None, backend=None):
+        backend = backend or STORAGE_BACKEND
+        path = path or BACKEND_PATHS[backend]
+        key = (backend, os.path.realpath(path))
+        model = self._by_path.get(key)
+        if model is None:
+            identity = file_identity(path)
+            model = self._by_identity.get((backend, identity)) if identity else None
+            if model is None:
+                model = LedgerModel(path, backend)
+                if identity:
+                    self._by_identity[(backend, identity)] = model
+            self._by_path[key] = model
+        model.refs += 1
+        return model
+
+    def release(self, model):
+        model.refs -= 1
+        if model.refs > 0:
+            return
+        for index in (self._by_identity, self._by_path):
+            for key in [k for k, v in index.items() if v is model]:
+                del index[key]
+        model.close()
+
+
+ledger_cache = LedgerCache()
+_default_model = None
+
+
+def default_model():
+    """EXPENSES_BACKEND 指定的預設帳本 (舊版單一視窗使用的帳本)。"""
+    global _default_model
+    if _default_model is None:
+        _default_model = ledger_cache.acquire()
+    return _default_model
+
+
+def get_expenses_data(model=None):
+    """只解析帳本新增的尾端，回傳持續累計的 (category_totals, category_data)。"""
+    model = model or default_model()
+    changed = model.refresh()
+    if not model.valid: return None, None
+    if not changed: return "NO_CHANGE", "NO_CHANGE"
+    return model.category_totals, model.category_data
 
-    category_data = defaultdict(list)
-    category_totals = defaultdict(float)
+
+def parse_date(text):
     try:
-        with open(DATA_FILE, mode='r', encoding='utf_8_sig') as file:
-            reader = csv.DictReader(file)
-            if not reader.fieldnames: return None, None
-            fieldnames = [f.lower() for f in reader.fieldnames]
-            if 'category' not in fieldnames: return None, None
-
-            for row in reader:
-                try:
-                    row_lower = {k.lower(): v for k, v in row.items()}
-                    amt = float(row_lower['amount'])
-                    cat = row_lower['category']
-                    date = row_lower['date']
-                    note = row_lower.get('notes', '')
-                    if cat:
-                        category_totals[cat] += amt
-                        category_data[cat].append((date, amt, note))
-                except: continue
-    except: return None, None
-    return category_totals, category_data
-
-def on_window_close(category):
-    if category in opened_windows:
-        del opened_windows[category]
-
-def show_custom_table(category):
-    """顯示詳細視窗 (智慧換行版)"""
-    if category in opened_windows:
-        win_info = opened_windows[category]
-        root = win_info['root']
-        if root.winfo_exists():
-            root.lift()
-            root.focus_force()
-            return
+        return datetime.strptime(text.strip(), DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+# --- 儀表板 (Dashboard view) ---
+
+class ExpenseDashboard:
+    """
+    一個圓餅圖視窗 (matplotlib Figure) 與它開啟的明細視窗。
+    資料一律從共用的 LedgerModel 取得，儀表板只保存自己的顯示狀態
+    (扇形、懸停、鑽取層級、日期區間)，因此同一個帳本開多個儀表板不會重複解析。
+    """
+
+    def __init__(self, model, fig, cache=None):
+        self.model = model
+        self.fig = fig
+        self.ax = fig.add_subplot()
+        self.cache = cache
+        self.closed = False
+
+        self.current_wedges = []
+        self.current_texts = []
+        self.current_autotexts = []
+        self.current_labels = []
+        self.hovered_index = -1
+        self.drill_offset = 0
+        self.date_range = None  # (start, end)，None 代表全部歷史
+        self.category_ranking = CategoryRanking({})
+        self.opened_windows = {}
+        self.pie = PieChart(self.ax)
+        self.hit_tester = WedgeHitTester()
+        self.highlighter = BlitHighlighter(fig)
+        if PROFILE_ENABLED:
+            # canvas 重繪時呼叫 figure.draw：包裝在實例上，量測 matplotlib 實際渲染的時間
+            fig.draw = timed('draw')(fig.draw)
+
+        fig.canvas.mpl_connect('button_press_event', self.on_click)
+        fig.canvas.mpl_connect("motion_notify_event", self.on_hover)
+        fig.canvas.mpl_connect('close_event', lambda event: self.close())
+        self.create_range_controls()
+        model.attach(self)
+        if model.valid:
+            self.show_ledger()
+        else:
+            self.draw_chart()
+
+    def close(self):
+        """視窗關閉：關閉明細視窗並釋放共用的資料模型。"""
+        if self.closed: return
+        self.closed = True
+        for win_info in list(self.opened_windows.values()):
+            try:
+                win_info['root'].destroy()
+            except tk.TclError:
+                pass
+        self.opened_windows.clear()
+        self.model.detach(self)
+        if self.cache is not None:
+            self.cache.release(self.model)
+
+    # --- 明細視窗 ---
+
+    def on_window_close(self, category):
+        if category in self.opened_windows:
+            del self.opened_windows[category]
+
+    def show_custom_table(self, category):
+        """顯示詳細視窗 (智慧換行版)"""
+        if category in self.opened_windows:
+            win_info = self.opened_windows[category]
+            root = win_info['root']
+            if root.winfo_exists():
+                root.lift()
+                root.focus_force()
+                return
+            else:
+                del self.opened_windows[category]
+
+        from Table_module import VirtualTable
+
+        root = tk.Tk()
+        root.title(f"{category} 明細")
+
+        # 設定視窗大小
+        w, h = 900, 600
+        ws, hs = root.winfo_screenwidth(), root.winfo_screenheight()
+        x, y = (ws/2) - (w/2), (hs/2) - (h/2)
+        root.geometry(f"{w}x{h}+{int(x)}+{int(y)}")
+        root.configure(bg="white")
+
+        root.protocol("WM_DELETE_WINDOW", lambda: [root.destroy(), self.on_window_close(category)])
+
+        hex_title_color = category_color(self.model.palette.index(category))
+
+        # --- 標題區 ---
+        header_frame = tk.Frame(root, bg="white")
+        header_frame.pack(fill=tk.X, pady=20, padx=30)
+
+        header_label = tk.Label(header_frame, text=f"📂 {category}",
+                 font=("Microsoft JhengHei", 24, "bold"),
+                 bg="white", fg=hex_title_color)
+        header_label.pack(side=tk.LEFT)
+
+        # --- 虛擬化明細表格 (只建立可視範圍內的列) ---
+        table = VirtualTable(root)
+
+        self.opened_windows[category] = {
+            'root': root,
+            'table': table,
+            'header_label': header_label
+        }
+
+        self.refresh_table_content(category)
+
+    def set_table_total(self, category, total):
+        self.opened_windows[category]['header_label'].config(text=f"📂 {category} (總計: ${int(total):,})")
+
+    @timed('table')
+    def refresh_table_content(self, category):
+        """以目前的日期區間重新載入整份明細與表頭總計。"""
+        if category not in self.opened_windows: return
+
+        self.opened_windows[category]['table'].set_items(self.model.range_details(category, self.date_range))
+        # 區間總計就是類別排名用的總計 (update_ranking 已向資料層查過)，不必為了表頭走訪 (組出) 每一列
+        self.set_table_total(category, self.category_ranking.totals.get(category, 0.0))
+
+    @timed('table.patch')
+    def patch_table_content(self, category, delta):
+        """只修補變動的列與表頭總計，不重建整個表格。"""
+        if category not in self.opened_windows: return
+
+        from Ledger_module import SortedRows
+
+        table = self.opened_windows[category]['table']
+        inserted = delta
+        if self.date_range is not None:
+            # 表格只顯示區間內的列：區間外的新增不插入表格
+            inserted = in_range(inserted, self.date_range)
+        if isinstance(table.items, SortedRows):
+            # 表格顯示的是資料層的即時檢視 (唯讀)：換上最新的檢視 (已依日期排好並包含這次的變動)，
+            # 只重畫可視範圍；類別已不存在時清空表格
+            details = self.model.category_data
+            table.set_items(details[category] if category in details else [])
         else:
-            del opened_windows[category]
-
-    items = current_details.get(category, [])
-    
-    root = tk.Tk()
-    root.title(f"{category} 明細")
-    
-    # 設定視窗大小
-    w, h = 900, 600
-    ws, hs = root.winfo_screenwidth(), root.winfo_screenheight()
-    x, y = (ws/2) - (w/2), (hs/2) - (h/2)
-    root.geometry(f"{w}x{h}+{int(x)}+{int(y)}")
-    root.configure(bg="white") 
-    
-    root.protocol("WM_DELETE_WINDOW", lambda: [root.destroy(), on_window_close(category)])
+            table.apply_delta(inserted)
+        # 表頭直接用資料層的 (區間) 總計，不在表格這邊累加 (累加會與資料層的浮點數結果漸漸不同)
+        self.set_table_total(category, self.category_ranking.totals.get(category, 0.0))
+
+    def update_open_tables(self, deltas=None):
+        """
+        依資料層提供的 deltas 更新已開啟的明細視窗 (只顯示目前日期區間內的列)：
+        沒有變動的類別完全不重繪；deltas (或某類別的 delta) 為 None 時才整份重新載入，
+        切換日期區間時即以 None 重新篩選每個視窗。
+        """
+        for category in list(self.opened_windows.keys()):
+            if deltas is not None and category not in deltas:
+                continue
+            delta = None if deltas is None else deltas[category]
+            if delta is not None:
+                self.patch_table_content(category, delta)
+            else:
+                self.refresh_table_content(category)
+
+    # --- 圖表 ---
+
+    def show_ledger(self):
+        """以帳本目前的內容重建類別排名、修補已開啟的明細視窗並重畫圓餅圖。"""
+        self.update_ranking()
+        self.update_open_tables(self.model.deltas)
+        self.draw_chart()
+        self.fig.canvas.draw_idle()
+
+    @timed('aggregate')
+    def update_ranking(self):
+        self.category_ranking = CategoryRanking(self.model.range_totals(self.date_range))
+
+    def set_date_range(self, new_range):
+        self.date_range = new_range
+        self.drill_offset = 0
+        if not self.model.valid: return
+        self.update_ranking()
+        self.update_open_tables()
+        self.draw_chart()
+        self.fig.canvas.draw_idle()
+
+    def on_range_selected(self, option):
+        today = date.today()
+        if option == '本月':
+            month_start = today.replace(day=1)
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
+            self.set_date_range((month_start, next_month - timedelta(days=1)))
+        elif option == '近 90 天':
+            self.set_date_range((today - timedelta(days=89), today))
+        elif option == '自訂':
+            self.on_custom_range(None)
+        else:
+            self.set_date_range(None)
+
+    def on_custom_range(self, text):
+        if self.range_selector.value_selected != '自訂': return
+        start, end = parse_date(self.start_box.text), parse_date(self.end_box.text)
+        # 日期格式錯誤時維持原本的區間
+        if start and end and start <= end:
+            self.set_date_range((start, end))
+
+    def create_range_controls(self):
+        """左下角的區間選擇與自訂起訖日期輸入框。"""
+        from matplotlib.widgets import RadioButtons, TextBox
+        fig = self.fig
+        fig.subplots_adjust(left=0.22, bottom=0.16)
+        self.range_selector = RadioButtons(fig.add_axes([0.01, 0.02, 0.17, 0.22], frameon=False), RANGE_OPTIONS)
+        self.range_selector.on_clicked(self.on_range_selected)
+        today = date.today()
+        self.start_box = TextBox(fig.add_axes([0.36, 0.02, 0.2, 0.05]), '起 ',
+                                 initial=today.replace(day=1).strftime(DATE_FORMAT))
+        self.end_box = TextBox(fig.add_axes([0.66, 0.02, 0.2, 0.05]), '迄 ', initial=today.strftime(DATE_FORMAT))
+        self.start_box.on_submit(self.on_custom_range)
+        self.end_box.on_submit(self.on_custom_range)
+
+    @timed('render')
+    def draw_chart(self):
+        """
+        依快取的類別排名畫出目前層級的圓餅圖 (前 TOP_N 名 + 「其他」)。
+        類別與配色不變時 PieChart 只更新既有扇形的角度與文字，不清空重建。
+        """
+        ax = self.ax
+        # 先取消凸顯：沿用的扇形要回到一般樣式
+        self.set_hovered(-1)
+
+        # 資料變少時，鑽取層級可能已經不存在
+        while self.drill_offset and self.drill_offset >= len(self.category_ranking):
+            self.drill_offset -= TOP_N
+        categories, sizes, folded = self.category_ranking.level(self.drill_offset, TOP_N)
+        # 「其他」扇形在 current_labels 中記為 None，點擊時鑽取下一層
+        self.current_labels = categories + [None] if folded else categories
+
+        if not sizes:
+            self.pie.clear()
+            self.current_wedges, self.current_texts, self.current_autotexts = [], [], []
+            self.hit_tester.set_wedges([])
+            self.highlighter.set_artists([])
+            draw_empty(ax, "等待資料輸入..." if self.date_range is None else "此區間沒有支出")
+            return
 
-    try:
-        cat_index = current_labels.index(category)
-        color_idx = cat_index % len(CUSTOM_COLORS)
-        title_color = darken_color(CUSTOM_COLORS[color_idx], factor=0.7) 
-        hex_title_color = mcolors.to_hex(title_color)
-    except:
-        hex_title_color = "#34495E"
-
-    # --- 標題區 ---
-    header_frame = tk.Frame(root, bg="white")
-    header_frame.pack(fill=tk.X, pady=20, padx=30)
-    
-    header_label = tk.Label(header_frame, text=f"📂 {category}", 
-             font=("Microsoft JhengHei", 24, "bold"), 
-             bg="white", fg=hex_title_color)
-    header_label.pack(side=tk.LEFT)
-
-    # --- 可捲動內容區 ---
-    container = tk.Frame(root, bg="white")
-    container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-
-    canvas = tk.Canvas(container, bg="white", highlightthickness=0)
-    scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-    
-    # 這裡不設定固定寬度，讓它自動適應
-    scrollable_frame = tk.Frame(canvas, bg="white")
-
-    # 🔧 關鍵修正 1：讓 scrollable_frame 的寬度永遠等於 canvas 的寬度
-    # 這樣內容就不會超出視窗邊緣
-    frame_id = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-
-    def _configure_canvas(event):
-        # 更新捲動範圍
-        canvas.configure(scrollregion=canvas.bbox("all"))
-        # 強制內層 Frame 寬度等於 Canvas 寬度
-        canvas.itemconfig(frame_id, width=event.width)
-
-    canvas.bind("<Configure>", _configure_canvas)
-    canvas.configure(yscrollcommand=scrollbar.set)
-
-    canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def _on_mousewheel(event):
-        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-    canvas.bind_all("<MouseWheel>", _on_mousewheel)
-
-    opened_windows[category] = {
-        'root': root,
-        'frame': scrollable_frame,
-        'header_label': header_label
-    }
-
-    refresh_table_content(category, items)
-
-def refresh_table_content(category, items):
-    if category not in opened_windows: return
-    
-    win_info = opened_windows[category]
-    frame = win_info['frame']
-    header_label = win_info['header_label']
-    
-    for widget in frame.winfo_children():
-        widget.destroy()
-        
-    total = 0
-    sorted_items = sorted(items, key=lambda x: x[0], reverse=True)
-    
-    # --- 表頭 ---
-    # 使用 Grid 排版，確保對齊
-    header_row = tk.Frame(frame, bg="#EEEEEE", pady=10) 
-    header_row.pack(fill=tk.X, expand=True)
-    
-    # 設定 Grid 權重，讓備註欄位(Column 2)自動伸縮
-    header_row.grid_columnconfigure(0, minsize=150) # 日期
-    header_row.grid_columnconfigure(1, minsize=120) # 金額
-    header_row.grid_columnconfigure(2, weight=1)    # 備註 (伸縮)
-
-    tk.Label(header_row, text="日期", font=("Microsoft JhengHei", 14, "bold"), 
-             bg="#EEEEEE", anchor="center").grid(row=0, column=0, sticky="ew")
-    tk.Label(header_row, text="金額", font=("Microsoft JhengHei", 14, "bold"), 
-             bg="#EEEEEE", anchor="center").grid(row=0, column=1, sticky="ew")
-    tk.Label(header_row, text="備註", font=("Microsoft JhengHei", 14, "bold"), 
-             bg="#EEEEEE", anchor="w").grid(row=0, column=2, sticky="ew", padx=20)
-
-    # --- 資料行 ---
-    for i, (date, amt, note) in enumerate(sorted_items):
-        total += amt
-        bg_color = "#F9F9F9" if i % 2 == 0 else "white"
-        
-        row_frame = tk.Frame(frame, bg=bg_color, pady=15)
-        row_frame.pack(fill=tk.X, expand=True)
-        
-        row_frame.grid_columnconfigure(0, minsize=150)
-        row_frame.grid_columnconfigure(1, minsize=120)
-        row_frame.grid_columnconfigure(2, weight=1) # 關鍵：備註欄位佔滿剩餘空間
-
-        # 1. 日期
-        tk.Label(row_frame, text=date, font=("Microsoft JhengHei", 14), 
-                 bg=bg_color, anchor="center").grid(row=0, column=0, sticky="ew")
-        
-        # 2. 金額
-        tk.Label(row_frame, text=f"${int(amt):,}", font=("Microsoft JhengHei", 14, "bold"), fg="#E74C3C",
-                 bg=bg_color, anchor="center").grid(row=0, column=1, sticky="ew")
-        
-        # 3. 備註 (🔧 關鍵修正 2：動態 Wraplength)
-        note_label = tk.Label(row_frame, text=note, font=("Microsoft JhengHei", 14), 
-                 bg=bg_color, anchor="w", justify="left")
-        note_label.grid(row=0, column=2, sticky="ew", padx=20)
-        
-        # 這個神奇的指令會監聽視窗變化，自動計算該在哪裡換行
-        # e.width - 10 表示：只要寬度一變，換行點就設為「當前寬度 - 10px」
-        note_label.bind('<Configure>', lambda e: e.widget.configure(wraplength=e.width-10))
-
-        ttk.Separator(frame, orient='horizontal').pack(fill='x')
-
-    header_label.config(text=f"📂 {category} (總計: ${int(total):,})")
-
-def update_open_tables(all_details):
-    for category in list(opened_windows.keys()):
-        if category in all_details:
-            new_items = all_details[category]
-            refresh_table_content(category, new_items)
-
-def update_chart(frame):
-    global current_wedges, current_texts, current_autotexts, current_labels, current_details
-    totals, details = get_expenses_data()
-    if totals == "NO_CHANGE" or totals is None: return
-
-    ax.clear()
-    current_details = details
-    labels = list(totals.keys())
-    sizes = list(totals.values())
-    current_labels = labels
-
-    update_open_tables(details)
-
-    if not sizes:
-        ax.text(0.5, 0.5, "等待資料輸入...", ha='center', va='center', fontsize=14, color='gray')
-        return
-
-    is_single = len(sizes) <= 1
-    edge_width = 0 if is_single else 2
-
-    wedges, texts, autotexts = ax.pie(
-        sizes, labels=labels, autopct='%1.1f%%', startangle=140,
-        colors=CUSTOM_COLORS, pctdistance=0.8, labeldistance=1.1
-    )
-
-    for i, w in enumerate(wedges):
-        w.set_edgecolor('white')
-        w.set_linewidth(edge_width)
-        face_color = w.get_facecolor()
-        text_color = darken_color(face_color, factor=0.45) 
-        texts[i].set_fontsize(14)        
-        texts[i].set_fontweight('bold')
-        texts[i].set_color(text_color)
-        autotexts[i].set_color('white')
-        autotexts[i].set_fontweight('bold')
-        autotexts[i].set_fontsize(11)
-        autotexts[i].set_path_effects([path_effects.withStroke(linewidth=2, foreground=text_color)])
-
-    current_wedges = wedges
-    current_texts = texts
-    current_autotexts = autotexts
-    ax.set_title('支出圓餅圖', fontsize=18, fontweight='bold', pad=20, color='#555')
-    ax.axis('equal') 
-
-def on_hover(event):
-    global hovered_index
-    if event.inaxes != ax: 
-        if hovered_index != -1: 
-            hovered_index = -1
-            for idx, wedge in enumerate(current_wedges):
+        colors = self.model.palette.pie_colors(categories, folded)
+        (wedges, texts, autotexts), rebuilt = self.pie.draw(categories, sizes, folded, colors)
+
+        self.current_wedges = wedges
+        self.current_texts = texts
+        self.current_autotexts = autotexts
+        self.hit_tester.set_wedges(wedges)
+        if rebuilt:
+            self.highlighter.set_artists(list(wedges) + list(texts) + list(autotexts))
+        title = CHART_TITLE if self.drill_offset == 0 else f'{CHART_TITLE} › {OTHER_LABEL} (右鍵返回)'
+        if self.date_range is not None:
+            title += f"\n{self.date_range[0]:{DATE_FORMAT}} ~ {self.date_range[1]:{DATE_FORMAT}}"
+        set_chart_title(ax, title)
+
+    def start_file_watch(self, path, callback):
+        """以事件驅動取代每秒輪詢；非 Tk 後端時退回 matplotlib 計時器輪詢。回傳有 stop() 的物件。"""
+        canvas = self.fig.canvas
+        get_tk_widget = getattr(canvas, 'get_tk_widget', None)
+        if get_tk_widget is not None:
+            return TkFileWatch(get_tk_widget(), path, callback)
+        watcher = StatPollingWatcher(path)
+        timer = canvas.new_timer(interval=POLL_MIN_MS)
+        timer.add_callback(lambda: watcher.poll() and callback())
+        timer.start()
+        return timer
+
+    # --- 滑鼠互動 ---
+
+    def set_hovered(self, index):
+        """凸顯第 index 個扇形 (-1 代表取消凸顯)，只在狀態改變時以 blitting 重畫。"""
+        if index == self.hovered_index: return
+        self.hovered_index = index
+        for idx, wedge in enumerate(self.current_wedges):
+            if index == -1:
+                wedge.set_alpha(1.0)
+                self.current_texts[idx].set_fontsize(14)
+            elif idx == index:
                 wedge.set_alpha(1.0)
-                current_texts[idx].set_fontsize(14)
-            fig.canvas.draw_idle()
-        return
-    found = False
-    for i, w in enumerate(current_wedges):
-        if w.contains(event)[0]:
-            found = True
-            if hovered_index != i:
-                hovered_index = i
-                for idx, wedge in enumerate(current_wedges):
-                    if idx == i:
-                        wedge.set_alpha(1.0) 
-                        current_texts[idx].set_fontsize(16) 
-                    else:
-                        wedge.set_alpha(0.3) 
-                        current_texts[idx].set_fontsize(14)
-                fig.canvas.draw_idle()
-            break
-    if not found and hovered_index != -1:
-        hovered_index = -1
-        for idx, wedge in enumerate(current_wedges):
-            wedge.set_alpha(1.0)
-            current_texts[idx].set_fontsize(14)
-        fig.canvas.draw_idle()
-
-def on_click(event):
-    if event.button != 1 or event.inaxes != ax: return
-    for i, wedge in enumerate(current_wedges):
-        if wedge.contains(event)[0]:
-            category = current_labels[i]
-            show_custom_table(category)
-            break
+                self.current_texts[idx].set_fontsize(16)
+            else:
+                wedge.set_alpha(0.3)
+                self.current_texts[idx].set_fontsize(14)
+        self.highlighter.update()
+
+    @timed('hover')
+    def on_hover(self, event):
+        self.set_hovered(self.hit_tester.hit_event(event, self.ax))
+
+    def on_click(self, event):
+        if event.button == 3 and self.drill_offset > 0:
+            # 右鍵：回到上一層
+            self.drill_offset -= TOP_N
+            self.draw_chart()
+            self.fig.canvas.draw_idle()
+            return
+        if event.button != 1: return
+        index = self.hit_tester.hit_event(event, self.ax)
+        if index == -1: return
+        category = self.current_labels[index]
+        if category is None:
+            # 點擊「其他」：從快取的排名切出下一層，不重新掃描帳本
+            self.drill_offset += TOP_N
+            self.draw_chart()
+            self.fig.canvas.draw_idle()
+        else:
+            self.show_custom_table(category)
+
+
+def open_dashboard(path=None, backend=None, fig=None, cache=None):
+    """
+    開啟一個儀表板；同一個帳本 (以檔案身分判斷) 的多個儀表板共用同一份解析結果與檔案監看。
+    fig 為 None 時以 pyplot 建立新視窗 (所有視窗共用同一個事件迴圈)。
+    """
+    cache = cache or ledger_cache
+    model = cache.acquire(path, backend)
+    if not model.valid:
+        model.ledger.refresh()
+    if fig is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(8, 6))
+    return ExpenseDashboard(model, fig, cache)
+
+
+# --- 啟動 (Startup) ---
+
+def show_splash():
+    """立即顯示的輕量視窗：matplotlib 與帳本在背景載入時讓使用者知道程式已經啟動。"""
+    splash = tk.Tk()
+    splash.title("支出圓餅圖")
+    tk.Label(splash, text="載入中...", font=("Microsoft JhengHei", 16), padx=60, pady=40).pack()
+    if STARTUP_PROBE:
+        splash.bind('<Map>', lambda e: print('first-window', flush=True), add='+')
+    return splash
+
+def preload(models):
+    """背景執行緒：載入 matplotlib 並第一次讀取帳本 (兩者都不碰 Tk，Tk 只能在主執行緒操作)。"""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    for model in models:
+        with measure('load'):
+            model.ledger.refresh()
 
 if __name__ == "__main__":
-    plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'Arial Unicode MS', 'SimHei'] 
-    plt.rcParams['axes.unicode_minus'] = False
-    fig, ax = plt.subplots(figsize=(8, 6))
-    fig.canvas.mpl_connect('button_press_event', on_click)
-    fig.canvas.mpl_connect("motion_notify_event", on_hover)
-    ani = animation.FuncAnimation(fig, update_chart, interval=1000, cache_frame_data=False)
-    plt.show()
\ No newline at end of file
+    # python Visualization_module.py [--profile] [帳本路徑 ...]：每個帳本一個視窗，未指定時開啟預設帳本
+    models = [ledger_cache.acquire(path) for path in (sys.argv[1:] or [None])]
+    splash = show_splash()
+    loader = threading.Thread(target=preload, args=(models,), daemon=True)
+    loader.start()
+    while loader.is_alive():
+        splash.update()
+        loader.join(SPLASH_POLL_SECONDS)
+    splash.destroy()
+
+    import matplotlib.pyplot as plt
+    configure_fonts(plt.rcParams)
+    dashboards = [open_dashboard(model.path, model.backend) for model in models]
+    for model in models:
+        # 啟動時取得的參考改由儀表板持有
+        ledger_cache.release(model)
+    if STARTUP_PROBE:
+        fig = dashboards[0].fig
+        def on_first_draw(event):
+            print('chart-ready', flush=True)
+            closer = fig.canvas.new_timer(interval=10)
+            closer.single_shot = True
+            closer.add_callback(plt.close, 'all')
+            closer.start()
+        fig.canvas.mpl_connect('draw_event', on_first_draw)
+    plt.show()
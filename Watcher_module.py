@@ -0,0 +1,176 @@
+import os
+import struct
+import sys
+
+# --- 配置 (Configuration) ---
+# 收到事件後延遲多久才通知 (合併同一次儲存產生的多個事件)
+DEBOUNCE_MS = 30
+# stat 輪詢的間隔：有變化時用最短間隔，閒置時逐步放慢到最長間隔。
+# 最長間隔就是沒有 inotify 時存檔後最久要等多久才會更新圖表，因此只放慢到幾百毫秒 (stat 本身只需數微秒)
+POLL_MIN_MS = 100
+POLL_MAX_MS = 400
+
+# inotify 常數 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+               IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+
+def file_signature(path):
+    """回傳 (mtime_ns, size, inode)；檔案不存在時為 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class StatPollingWatcher:
+    """以 stat 輪詢偵測變化，比較 (mtime_ns, size, inode) 而非只比較 mtime。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = file_signature(path)
+
+    def fileno(self):
+        return None
+
+    def poll(self):
+        """回傳檔案自上次呼叫後是否有變化。"""
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux inotify 監看器。監看檔案所在的目錄，因此檔案被重新建立或
+    以 rename 替換 (原子發布) 時也能收到通知。
+    """
+
+    def __init__(self, path):
+        # ctypes (含 ctypes.util) 載入較慢，只在真的使用 inotify 時才匯入
+        import ctypes
+        import ctypes.util
+        self.path = path
+        self._name = os.fsencode(os.path.basename(path))
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失敗')
+        directory = os.fsencode(os.path.dirname(os.path.abspath(path)))
+        if libc.inotify_add_watch(self._fd, directory, _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, 'inotify_add_watch 失敗')
+
+    def fileno(self):
+        return self._fd
+
+    def poll(self):
+        """讀出所有待處理事件，回傳其中是否有目標檔案的事件。"""
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            if not buffer:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW or name == self._name:
+                    changed = True
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(path):
+    """Linux 上使用 inotify，其他平台或失敗時退回 stat 輪詢。"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError):
+            pass
+    return StatPollingWatcher(path)
+
+
+class TkFileWatch:
+    """
+    把檔案變更事件接到 Tk 事件迴圈：
+    inotify 的 fd 直接交給 Tk 的 createfilehandler，閒置時不會有任何喚醒；
+    輪詢模式則用 after() 並在閒置時逐步拉長間隔。
+    """
+
+    def __init__(self, widget, path, callback, watcher=None):
+        self.widget = widget
+        self.callback = callback
+        self.watcher = watcher or create_watcher(path)
+        self._pending = None
+        self._poll_job = None
+        self._poll_interval = POLL_MIN_MS
+
+        fd = self.watcher.fileno()
+        self._uses_filehandler = fd is not None and hasattr(widget.tk, 'createfilehandler')
+        if self._uses_filehandler:
+            import tkinter
+            widget.tk.createfilehandler(fd, tkinter.READABLE, self._on_readable)
+        else:
+            self._schedule_poll()
+
+    def _notify(self):
+        # 同一批事件只通知一次
+        if self._pending is None:
+            self._pending = self.widget.after(DEBOUNCE_MS, self._fire)
+
+    def _fire(self):
+        self._pending = None
+        self.callback()
+
+    def _on_readable(self, fd, mask):
+        if self.watcher.poll():
+            self._notify()
+
+    def _schedule_poll(self):
+        self._poll_job = self.widget.after(self._poll_interval, self._poll)
+
+    def _poll(self):
+        if self.watcher.poll():
+            self._poll_interval = POLL_MIN_MS
+            self._notify()
+        else:
+            self._poll_interval = min(self._poll_interval * 2, POLL_MAX_MS)
+        self._schedule_poll()
+
+    def stop(self):
+        if self._uses_filehandler:
+            self.widget.tk.deletefilehandler(self.watcher.fileno())
+        for job in (self._pending, self._poll_job):
+            if job is not None:
+                try:
+                    self.widget.after_cancel(job)
+                except Exception:
+                    pass
+        self.watcher.close()
@@ -0,0 +1,58 @@
+"""
+載入基準測試：比較 CSV 與欄式帳本 (mmap) 的冷載入時間與常駐記憶體 (RSS)。
+每次量測都在獨立的子行程執行，RSS 才不會互相影響。
+
+    python benchmarks/bench_columnar_load.py --sizes 1000000 10000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import synth
+from Columnar_module import convert_csv
+from Storage_module import open_ledger
+
+
+def load_once(backend, path):
+    start = time.perf_counter()
+    ledger = open_ledger(backend, path)
+    ledger.refresh()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss 在 Linux 為 KB
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {'seconds': elapsed, 'peak_rss_mb': rss_mb, 'categories': len(ledger.category_totals)}
+
+
+def measure(backend, path):
+    output = subprocess.check_output([sys.executable, __file__, '--child', backend, path])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(load_once(*args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'backend':>9} {'load':>10} {'peak RSS':>10}")
+        for rows in args.sizes:
+            csv_path = synth.write_ledger(os.path.join(tmp, f'ledger_{rows}.csv'), rows)
+            ledger_path = os.path.join(tmp, f'ledger_{rows}.ledger')
+            convert_csv(csv_path, ledger_path)
+            for backend, path in (('csv', csv_path), ('columnar', ledger_path)):
+                result = measure(backend, path)
+                print(f"{rows:>12,} {backend:>9} {result['seconds']:>8.3f} s {result['peak_rss_mb']:>7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
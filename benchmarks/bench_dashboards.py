@@ -0,0 +1,67 @@
+"""
+多儀表板基準測試 (Agg，不開視窗)：開啟 V 個儀表板但只指向 L 個不同的帳本，
+量測解析後的記憶體 (tracemalloc) 與一次檔案變更後重新整理的時間。
+兩者應該隨 L 成長，而不隨 V 成長。
+
+    python benchmarks/bench_dashboards.py --rows 200000 --ledgers 1 2 --views 1 4 16
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+
+import synth
+from Storage_module import CsvExpenseStore
+from Visualization_module import LedgerCache, open_dashboard
+
+RECORD = {'date': '2024-05-01', 'amount': 120.0, 'category': '食物', 'notes': '午餐'}
+
+
+def measure(paths, views):
+    from matplotlib.figure import Figure
+
+    cache = LedgerCache()
+    tracemalloc.start()
+    dashboards = [open_dashboard(paths[i % len(paths)], 'csv', fig=Figure(), cache=cache)
+                  for i in range(views)]
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    for path in paths:
+        CsvExpenseStore(path, durability='none').append(RECORD)
+    start = time.perf_counter()
+    models = {id(d.model): d.model for d in dashboards}
+    for model in models.values():
+        model.refresh()
+    refresh_ms = (time.perf_counter() - start) * 1000
+
+    for dashboard in dashboards:
+        dashboard.close()
+    return memory_mb, refresh_ms, len(models)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--ledgers', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--views', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'ledgers':>8} {'views':>6} {'models':>7} {'memory':>10} {'refresh':>10}")
+        for ledgers in args.ledgers:
+            paths = [synth.write_ledger(os.path.join(tmp, f'user{i}.csv'), args.rows, seed=i)
+                     for i in range(ledgers)]
+            for views in args.views:
+                memory_mb, refresh_ms, models = measure(paths, views)
+                print(f"{ledgers:>8} {views:>6} {models:>7} {memory_mb:>7.1f} MB {refresh_ms:>7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+批次匯入基準測試：量測 Import_module.import_file 的吞吐量 (rows/sec) 與尖峰記憶體 (RSS)。
+來源檔每 REJECT_EVERY 列混入一筆無效紀錄，退件報告的成本也一併計入。
+每次量測都在獨立的子行程執行，RSS 才能反映匯入本身的記憶體上限。
+
+    python benchmarks/bench_import.py --sizes 100000 1000000 --chunk-rows 10000 50000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import synth
+from Storage_module import BOM, FIELDNAMES, encode_header, encode_records
+
+REJECT_EVERY = 100
+BAD_RECORD = {'date': '2024-13-01', 'amount': '-1', 'category': '', 'notes': 'bad'}
+
+
+def write_source(path, rows):
+    """寫出與 synth.write_ledger 相同分布、但夾雜無效列的匯入來源檔。"""
+    with open(path, 'wb') as f:
+        f.write(BOM + encode_header(FIELDNAMES))
+        batch = []
+        for i, record in enumerate(synth.make_records(rows)):
+            batch.append(BAD_RECORD if i % REJECT_EVERY == REJECT_EVERY - 1 else record)
+            if len(batch) >= 100_000:
+                f.write(encode_records(batch, FIELDNAMES))
+                batch = []
+        f.write(encode_records(batch, FIELDNAMES))
+    return path
+
+
+def import_once(source, chunk_rows, tmp):
+    from Import_module import import_file
+    from Storage_module import CsvExpenseStore
+
+    store = CsvExpenseStore(os.path.join(tmp, 'expenses.csv'), durability='fsync')
+    start = time.perf_counter()
+    imported, rejected = import_file(source, store=store, chunk_rows=chunk_rows,
+                                     rejects_path=os.path.join(tmp, 'rejected.csv'))
+    elapsed = time.perf_counter() - start
+    # ru_maxrss 在 Linux 為 KB
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {'seconds': elapsed, 'imported': imported, 'rejected': rejected, 'peak_rss_mb': rss_mb}
+
+
+def measure(source, chunk_rows, tmp):
+    output = subprocess.check_output(
+        [sys.executable, __file__, '--child', source, str(chunk_rows), tmp])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--chunk-rows', type=int, nargs='+', default=[10_000, 50_000])
+    parser.add_argument('--child', nargs=3, metavar=('SOURCE', 'CHUNK_ROWS', 'TMP'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        source, chunk_rows, tmp = args.child
+        print(json.dumps(import_once(source, int(chunk_rows), tmp)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'chunk':>8} {'time':>9} {'rows/sec':>12} {'rejected':>9} {'peak RSS':>10}")
+        for rows in args.sizes:
+            source = write_source(os.path.join(tmp, f'source_{rows}.csv'), rows)
+            for chunk_rows in args.chunk_rows:
+                run_dir = tempfile.mkdtemp(dir=tmp)
+                result = measure(source, chunk_rows, run_dir)
+                rate = rows / result['seconds']
+                print(f"{rows:>12,} {chunk_rows:>8,} {result['seconds']:>7.2f} s {rate:>12,.0f} "
+                      f"{result['rejected']:>9,} {result['peak_rss_mb']:>7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
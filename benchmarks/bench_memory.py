@@ -0,0 +1,81 @@
+"""
+明細記憶體基準測試：比較舊版「每列一個 (date, amount, note) tuple 存在 defaultdict(list)」
+與 DetailStore (類別代碼 + array 欄位 + 共用備註緩衝區) 載入後常駐的記憶體與載入時間。
+兩者使用同一個解析器 (LedgerAggregator)，只有明細的存放方式不同。
+
+    python benchmarks/bench_memory.py --sizes 100000 1000000 --note-length 20
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+import synth
+from Ledger_module import LedgerAggregator
+
+
+class TupleDetails(defaultdict):
+    """舊版的明細格式：{category: [(date, amount, note), ...]}。"""
+
+    def __init__(self):
+        super().__init__(list)
+
+    def append(self, date, amount, category, note):
+        self[category].append((date, amount, note))
+
+
+class TupleAggregator(LedgerAggregator):
+    def reset(self):
+        super().reset()
+        self.category_data = TupleDetails()
+
+
+def measure(cls, path):
+    """回傳 (載入秒數, 常駐的明細 + 彙總記憶體 bytes, 載入期間的尖峰 bytes)。"""
+    start = time.perf_counter()
+    cls(path).refresh()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    ledger = cls(path)
+    ledger.refresh()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del ledger
+    return elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--categories', type=int, default=9)
+    parser.add_argument('--note-length', type=int, default=12)
+    parser.add_argument('--json', help='把結果寫成 JSON')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rows':>10} {'layout':<8} {'load':>9} {'retained':>10} {'bytes/row':>10} {'peak':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            path = synth.write_ledger(os.path.join(tmp, 'expenses.csv'), rows,
+                                      categories=args.categories, note_length=args.note_length)
+            for layout, cls in (('tuples', TupleAggregator), ('compact', LedgerAggregator)):
+                elapsed, retained, peak = measure(cls, path)
+                results.append({'rows': rows, 'layout': layout, 'load_ms': round(elapsed * 1000, 1),
+                                'retained_mb': round(retained / 1024 / 1024, 2),
+                                'bytes_per_row': round(retained / rows, 1),
+                                'peak_mb': round(peak / 1024 / 1024, 2)})
+                print(f"{rows:>10,} {layout:<8} {elapsed * 1000:>6.0f} ms {retained / 1024 / 1024:>7.1f} MB "
+                      f"{retained / rows:>10.1f} {peak / 1024 / 1024:>7.1f} MB")
+            os.remove(path)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
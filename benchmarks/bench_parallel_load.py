@@ -0,0 +1,89 @@
+"""
+平行載入基準測試：比較逐塊解析與以 N 個行程平行解析 (LedgerAggregator._load_parallel) 的冷載入時間，
+並確認合併後的結果與逐塊解析完全相同：類別總計 (含順序與浮點數的每一位)、每個類別的明細、
+每日的桶與日期區間查詢。合成帳本的備註含引號與換行，切點附近的多行紀錄也會被檢查到。
+行程池的啟動 (spawn) 與結果傳回主行程的時間都算在載入時間內。
+
+    python benchmarks/bench_parallel_load.py --sizes 1000000 5000000 --workers 2 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date
+
+import synth
+import Ledger_module
+from Ledger_module import LedgerAggregator
+
+# 驗證用的日期區間 (含只涵蓋部分月份的區間)
+CHECK_RANGES = [(None, None), (date(2024, 1, 15), date(2024, 3, 10)), (date(2023, 12, 31), date(2024, 1, 1))]
+
+
+def load(path, workers):
+    """workers 為 1 時逐塊解析；回傳 (秒數, ledger)。"""
+    Ledger_module.LOAD_WORKERS = workers
+    Ledger_module.PARALLEL_LOAD_BYTES = 0 if workers > 1 else float('inf')
+    ledger = LedgerAggregator(path)
+    start = time.perf_counter()
+    ledger.refresh()
+    return time.perf_counter() - start, ledger
+
+
+def snapshot(ledger):
+    return (
+        list(ledger.category_totals.items()),
+        {category: list(ledger.category_data[category]) for category in ledger.category_data},
+        [(ordinal, list(bucket.items())) for ordinal, bucket in ledger.date_index.days.items()],
+        [sorted(ledger.range_totals(start, end).items()) for start, end in CHECK_RANGES],
+        ledger._offset,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument('--categories', type=int, default=9)
+    parser.add_argument('--note-length', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help='把結果寫成 JSON')
+    args = parser.parse_args()
+    workers_list = sorted({w for w in args.workers if w > 1})
+
+    results = []
+    print(f"cpu_count={os.cpu_count()}")
+    print(f"{'rows':>12} {'file':>9} {'workers':>8} {'load':>10} {'speedup':>8}  exact")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            path = synth.write_ledger(os.path.join(tmp, 'expenses.csv'), rows,
+                                      categories=args.categories, note_length=args.note_length)
+            file_mb = os.path.getsize(path) / 1024 / 1024
+            sequential = min(load(path, 1)[0] for _ in range(args.repeat))
+            reference = snapshot(load(path, 1)[1])
+            print(f"{rows:>12,} {file_mb:>6.1f} MB {1:>8} {sequential:>8.3f} s {1:>7.2f}x  -")
+            results.append({'rows': rows, 'workers': 1, 'load_s': round(sequential, 3), 'speedup': 1.0})
+            for workers in workers_list:
+                samples = []
+                for _ in range(args.repeat):
+                    elapsed, ledger = load(path, workers)
+                    samples.append(elapsed)
+                exact = snapshot(ledger) == reference
+                best = min(samples)
+                print(f"{rows:>12,} {file_mb:>6.1f} MB {workers:>8} {best:>8.3f} s "
+                      f"{sequential / best:>7.2f}x  {'yes' if exact else 'NO'}")
+                results.append({'rows': rows, 'workers': workers, 'load_s': round(best, 3),
+                                'speedup': round(sequential / best, 2), 'exact': exact})
+                if not exact:
+                    raise SystemExit(f"{rows} 列、{workers} 個行程的結果與逐塊解析不同")
+                del ledger
+            os.remove(path)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
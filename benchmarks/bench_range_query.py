@@ -0,0 +1,77 @@
+"""
+日期區間查詢基準測試：比較日期索引 (每日 / 每月桶) 與逐列掃描的查詢時間。
+逐列掃描以欄式帳本的 NumPy 遮罩實作 (已經是最快的全表掃描)，作為對照組。
+
+    python benchmarks/bench_range_query.py --rows 10000000 --backend columnar
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import synth
+from Columnar_module import ColumnarLedger, convert_csv
+from Storage_module import open_ledger
+
+SPANS = [('本月', 30), ('近 90 天', 90), ('一年', 365), ('五年', 5 * 365)]
+
+
+def scan_totals(ledger, start, end):
+    import numpy as np
+    mask = (ledger.dates >= start.toordinal()) & (ledger.dates <= end.toordinal())
+    sums = np.bincount(ledger.categories[mask], weights=ledger.amounts[mask],
+                       minlength=len(ledger.category_names))
+    return {ledger.category_names[i]: s for i, s in enumerate(sums.tolist()) if s}
+
+
+def median_ms(fn, ranges):
+    samples = []
+    for start, end in ranges:
+        t0 = time.perf_counter()
+        fn(start, end)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--backend', default='columnar', choices=['csv', 'columnar', 'sqlite'])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = synth.write_ledger(os.path.join(tmp, 'ledger.csv'), args.rows)
+        ledger_path = os.path.join(tmp, 'ledger.ledger')
+        convert_csv(csv_path, ledger_path)
+        paths = {'csv': csv_path, 'columnar': ledger_path}
+        if args.backend == 'sqlite':
+            from Sqlite_module import import_csv
+            paths['sqlite'] = os.path.join(tmp, 'ledger.db')
+            import_csv(csv_path, paths['sqlite'])
+
+        t0 = time.perf_counter()
+        ledger = open_ledger(args.backend, paths[args.backend])
+        ledger.refresh()
+        print(f"{args.rows:,} 列，{args.backend} 載入 (含日期索引) {time.perf_counter() - t0:.2f} s")
+
+        baseline = ColumnarLedger(ledger_path)
+        baseline.refresh()
+        first, last = date(2015, 1, 1).toordinal(), date(2025, 12, 28).toordinal()
+        print(f"{'區間':>8} {'索引查詢':>12} {'逐列掃描':>12}")
+        for name, days in SPANS:
+            ranges = []
+            for _ in range(args.queries):
+                start = date.fromordinal(rng.randint(first, last - days))
+                ranges.append((start, start + timedelta(days=days - 1)))
+            indexed = median_ms(ledger.range_totals, ranges)
+            scanned = median_ms(lambda s, e: scan_totals(baseline, s, e), ranges)
+            print(f"{name:>8} {indexed:>9.3f} ms {scanned:>9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
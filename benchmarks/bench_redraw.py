@@ -0,0 +1,77 @@
+"""
+圓餅圖重畫基準測試 (Agg，不開視窗)：類別不變、只有金額改變時，
+比較完整重建 (ax.clear() + ax.pie) 與 PieChart 原地更新扇形的時間，
+並確認原地更新後的扇形角度與文字位置和重新呼叫 ax.pie 的結果相同。
+
+    python benchmarks/bench_redraw.py --categories 9 --repeat 200
+"""
+import argparse
+import random
+import time
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+
+import synth
+from Chart_module import CategoryPalette, PieChart, draw_pie
+
+
+def snapshot(wedges, texts, autotexts):
+    return ([(round(w.theta1, 6), round(w.theta2, 6)) for w in wedges],
+            [(round(t.get_position()[0], 6), round(t.get_position()[1], 6), t.get_horizontalalignment())
+             for t in texts],
+            [t.get_text() for t in autotexts])
+
+
+def time_redraws(fig, chart, categories, series, colors, rebuild):
+    """回傳 (更新 artist 的平均毫秒, 含 Agg 渲染的平均毫秒)。"""
+    update = render = 0.0
+    for sizes in series:
+        if rebuild:
+            chart.key = None
+        start = time.perf_counter()
+        chart.draw(categories, sizes, 0, colors)
+        middle = time.perf_counter()
+        fig.canvas.draw()
+        update += middle - start
+        render += time.perf_counter() - start
+    return update / len(series) * 1000, render / len(series) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--categories', type=int, default=9)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    rng = random.Random(0)
+    categories = (synth.CATEGORIES + [f'類別{i}' for i in range(args.categories)])[:args.categories]
+    colors = CategoryPalette().pie_colors(categories)
+    series = [[rng.uniform(10, 1000) for _ in categories] for _ in range(args.repeat)]
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    chart = PieChart(fig.add_subplot())
+    chart.draw(categories, series[0], 0, colors)
+
+    # 正確性：原地更新與重新 ax.pie 的結果一致
+    reference = Figure().add_subplot()
+    for sizes in series[:20]:
+        artists, rebuilt = chart.draw(categories, sizes, 0, colors)
+        assert not rebuilt
+        expected = draw_pie(reference, categories, sizes, 0, colors)
+        assert snapshot(*artists) == snapshot(*expected), "原地更新的結果與 ax.pie 不同"
+        reference.clear()
+
+    print(f"{'mode':<10} {'update':>10} {'with render':>12}")
+    for mode, rebuild in (('rebuild', True), ('in-place', False)):
+        update, render = time_redraws(fig, chart, categories, series, colors, rebuild)
+        print(f"{mode:<10} {update:>7.2f} ms {render:>9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
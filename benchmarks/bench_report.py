@@ -0,0 +1,44 @@
+"""
+無視窗報表基準測試：以不同行程數輸出多個合成帳本，回報每秒輸出的圖表數 (charts/sec)。
+
+    python benchmarks/bench_report.py --ledgers 200 --rows 5000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+
+import synth
+from Report_module import render_many
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ledgers', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=5_000, help='每個帳本的筆數')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--charts', nargs='*', default=['png'])
+    parser.add_argument('--tables', nargs='*', default=['csv'])
+    args = parser.parse_args()
+    # 缺少中文字型時 matplotlib 會對每個字發出警告，量測時略過
+    warnings.filterwarnings('ignore')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledgers = [synth.write_ledger(os.path.join(tmp, f'user{i}.csv'), args.rows, seed=i)
+                   for i in range(args.ledgers)]
+        print(f"{'workers':>8} {'time':>9} {'charts/sec':>11}")
+        for workers in args.workers:
+            out = os.path.join(tmp, f'out_{workers}')
+            jobs = [(path, os.path.join(out, os.path.basename(path))) for path in ledgers]
+            start = time.perf_counter()
+            errors = [error for _, _, error in render_many(jobs, workers, charts=args.charts,
+                                                            tables=args.tables) if error]
+            elapsed = time.perf_counter() - start
+            if errors:
+                raise SystemExit(f"輸出失敗: {errors[0]}")
+            print(f"{workers:>8} {elapsed:>7.2f} s {args.ledgers / elapsed:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+儲存延遲基準測試：證明 CsvExpenseStore.append 的延遲不隨帳本大小成長。
+
+    python benchmarks/bench_save_latency.py --sizes 1000 10000 100000 1000000 10000000
+    python benchmarks/bench_save_latency.py --legacy   # 一併量測舊版 read-concat-rewrite
+    python benchmarks/bench_save_latency.py --background   # 量測 BackgroundWriter 在主執行緒上的成本
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import synth
+from Storage_module import BackgroundWriter, CsvExpenseStore
+
+RECORD = {'date': '2024-05-01', 'amount': 120.0, 'category': '食物', 'notes': '午餐'}
+
+
+def bench_append(path, saves, durability):
+    store = CsvExpenseStore(path, durability=durability)
+    samples = []
+    for _ in range(saves):
+        start = time.perf_counter()
+        store.append(RECORD)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class _CountingStore(CsvExpenseStore):
+    commits = 0
+
+    def append_many(self, records):
+        self.commits += 1
+        super().append_many(records)
+
+
+def bench_background(path, saves, durability):
+    """回傳 (submit 延遲樣本, 全部落盤所需秒數, 實際寫入次數)。"""
+    store = _CountingStore(path, durability=durability)
+    writer = BackgroundWriter(store)
+    samples = []
+    start_all = time.perf_counter()
+    for _ in range(saves):
+        start = time.perf_counter()
+        writer.submit(RECORD)
+        samples.append(time.perf_counter() - start)
+    writer.close()
+    return samples, time.perf_counter() - start_all, store.commits
+
+
+def bench_legacy(path, saves):
+    import pandas as pd
+    samples = []
+    for _ in range(saves):
+        start = time.perf_counter()
+        df = pd.read_csv(path, encoding='utf_8_sig')
+        df = pd.concat([df, pd.DataFrame([RECORD])], ignore_index=True)
+        df.to_csv(path, index=False, encoding='utf_8_sig')
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'median_ms': statistics.median(ordered) * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--saves', type=int, default=200)
+    parser.add_argument('--durability', default='fsync')
+    parser.add_argument('--legacy', action='store_true', help='一併量測舊版 pandas 寫法 (大帳本會非常慢)')
+    parser.add_argument('--background', action='store_true', help='一併量測背景寫入 (group commit)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'append median':>15} {'append p99':>12} {'legacy median':>15}")
+        for rows in args.sizes:
+            path = synth.write_ledger(os.path.join(tmp, f'ledger_{rows}.csv'), rows)
+            result = summarize(bench_append(path, args.saves, args.durability))
+            legacy = ''
+            if args.legacy:
+                synth.write_ledger(path, rows)
+                legacy = f"{summarize(bench_legacy(path, 3))['median_ms']:>12.2f} ms"
+            print(f"{rows:>12,} {result['median_ms']:>12.3f} ms {result['p99_ms']:>9.3f} ms {legacy:>15}")
+            if args.background:
+                samples, total, commits = bench_background(path, args.saves, args.durability)
+                queued = summarize(samples)
+                print(f"{'':>12} background submit median {queued['median_ms']:.3f} ms, "
+                      f"p99 {queued['p99_ms']:.3f} ms; {args.saves} saves durable in "
+                      f"{total * 1000:.1f} ms with {commits} writes")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
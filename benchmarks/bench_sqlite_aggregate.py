@@ -0,0 +1,49 @@
+"""
+SQLite 彙總基準測試：比較 SUM(amount) GROUP BY category 與單一類別明細查詢，
+以及 CSV 後端整份解析的時間。
+
+    python benchmarks/bench_sqlite_aggregate.py --sizes 1000000 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import synth
+from Sqlite_module import import_csv
+from Storage_module import open_ledger
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--skip-csv', action='store_true', help='不量測 CSV 整份解析')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'import':>10} {'GROUP BY':>10} {'detail':>10} {'csv load':>10}")
+        for rows in args.sizes:
+            csv_path = synth.write_ledger(os.path.join(tmp, f'ledger_{rows}.csv'), rows)
+            db_path = os.path.join(tmp, f'ledger_{rows}.db')
+            import_seconds, _ = timed(lambda: import_csv(csv_path, db_path))
+
+            ledger = open_ledger('sqlite', db_path)
+            aggregate_seconds, _ = timed(ledger.refresh)
+            category = max(ledger.category_totals, key=ledger.category_totals.get)
+            detail_seconds, _ = timed(lambda: ledger.category_data[category])
+
+            csv_seconds = float('nan')
+            if not args.skip_csv:
+                csv_seconds, _ = timed(open_ledger('csv', csv_path).refresh)
+            print(f"{rows:>12,} {import_seconds:>8.2f} s {aggregate_seconds:>8.3f} s "
+                  f"{detail_seconds:>8.3f} s {csv_seconds:>8.3f} s")
+
+
+if __name__ == '__main__':
+    main()
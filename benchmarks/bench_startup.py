@@ -0,0 +1,138 @@
+"""
+啟動時間基準測試 (回歸指標)：
+  1. import time：以 python -X importtime 量測兩個進入點模組的匯入時間、最重的直接依賴，
+     以及匯入期間載入的第三方套件 (Input_module 必須只依賴標準函式庫，否則以結束碼 1 回報)。
+  2. time-to-first-window：設定 EXPENSES_STARTUP_PROBE 啟動程式，量測到第一個視窗出現
+     (視覺化模組另外量測圖表第一次畫完) 的時間。沒有顯示環境時略過這一項。
+
+    python benchmarks/bench_startup.py --runs 5 --rows 100000 --json startup.json
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import synth
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCAL_MODULES = {os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(REPO, '*.py'))}
+# 進入點 -> 啟動探針會印出的標記
+ENTRY_POINTS = {
+    'Input_module': ('first-window',),
+    'Visualization_module': ('first-window', 'chart-ready'),
+}
+STDLIB_ONLY = ('Input_module',)
+WINDOW_TIMEOUT_SECONDS = 120
+
+
+def import_profile(module):
+    """回傳 {'import_ms', 'heaviest', 'third_party'}：只計入 module 本身觸發的匯入。"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, raw_name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue # 表頭
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((depth, int(cumulative), raw_name.strip()))
+
+    # importtime 以後序輸出：目標模組之前、縮排較深的連續列就是它觸發的匯入
+    index = max(i for i, (depth, _, name) in enumerate(rows) if depth == 0 and name == module)
+    dependencies = []
+    for depth, cumulative, name in reversed(rows[:index]):
+        if depth == 0:
+            break
+        dependencies.append((depth, cumulative, name))
+
+    third_party = sorted({name.split('.')[0] for _, _, name in dependencies} -
+                         set(sys.stdlib_module_names) - LOCAL_MODULES)
+    heaviest = sorted(((c, n) for d, c, n in dependencies if d == 1), reverse=True)[:5]
+    return {
+        'import_ms': rows[index][1] / 1000,
+        'heaviest': [(name, cumulative / 1000) for cumulative, name in heaviest],
+        'third_party': third_party,
+    }
+
+
+def has_display():
+    check = 'import tkinter; tkinter.Tk().destroy()'
+    return subprocess.run([sys.executable, '-c', check], capture_output=True).returncode == 0
+
+
+def time_to_window(module, markers, cwd):
+    """啟動進入點，回傳 {標記: 自啟動起的秒數}；逾時則回傳已收到的部分。"""
+    env = dict(os.environ, EXPENSES_STARTUP_PROBE='1', PYTHONPATH=REPO)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO, module + '.py')], cwd=cwd, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    seen = {}
+
+    def read():
+        for line in proc.stdout:
+            mark = line.strip()
+            if mark in markers and mark not in seen:
+                seen[mark] = time.perf_counter() - start
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        proc.wait(timeout=WINDOW_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    reader.join(1)
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=100_000, help='first-window 量測使用的帳本筆數')
+    parser.add_argument('--json', help='把結果寫成 JSON (供回歸比較)')
+    args = parser.parse_args()
+
+    report = {'imports': {}, 'windows': {}}
+    print(f"{'module':<22} {'import':>10}  third-party / heaviest imports")
+    for module in ENTRY_POINTS:
+        samples = [import_profile(module) for _ in range(args.runs)]
+        profile = samples[-1]
+        profile['import_ms'] = statistics.median(s['import_ms'] for s in samples)
+        report['imports'][module] = profile
+        heaviest = ', '.join(f"{name} {ms:.0f}ms" for name, ms in profile['heaviest'][:3])
+        print(f"{module:<22} {profile['import_ms']:>7.1f} ms  "
+              f"[{', '.join(profile['third_party']) or 'stdlib only'}] {heaviest}")
+
+    if has_display():
+        with tempfile.TemporaryDirectory() as tmp:
+            synth.write_ledger(os.path.join(tmp, 'expenses.csv'), args.rows)
+            for module, markers in ENTRY_POINTS.items():
+                runs = [time_to_window(module, markers, tmp) for _ in range(args.runs)]
+                result = {mark: statistics.median(r[mark] for r in runs if mark in r)
+                          for mark in markers if any(mark in r for r in runs)}
+                report['windows'][module] = result
+                print(f"{module:<22} " + '  '.join(f"{mark} {seconds * 1000:.0f} ms"
+                                                  for mark, seconds in result.items()))
+    else:
+        print("沒有顯示環境 (DISPLAY)，略過 time-to-first-window")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    regressions = [m for m in STDLIB_ONLY if report['imports'][m]['third_party']]
+    if regressions:
+        print(f"回歸：{', '.join(regressions)} 載入了第三方套件")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
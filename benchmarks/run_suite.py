@@ -0,0 +1,330 @@
+"""
+效能基準測試套件：以合成帳本 (synth.py) 量測各熱點，結果輸出成 JSON 供不同版本之間比較。
+  load    get_expenses_data 第一次解析 + 彙總的時間與尖峰記憶體 (tracemalloc)
+  render  ExpenseDashboard.show_ledger 在 Agg 下的時間 (完整重畫 / 類別不變時的更新) 與 canvas 渲染時間
+  table   明細表格的第一頁：最大類別第一次開啟 (建立排序) 與之後重新整理的時間；有顯示環境時另外量測 VirtualTable 建立
+  save    以無視窗方式驅動 ExpenseApp.save_expense：主執行緒耗時與寫入落盤延遲
+
+    python benchmarks/run_suite.py --sizes 1000 100000 1000000 --categories 9 200 --note-length 20 --json new.json
+    python benchmarks/run_suite.py --json new.json --compare old.json   # 變慢超過 --threshold 時結束碼為 1
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+
+import synth
+from Input_module import ExpenseApp
+from Ledger_module import sort_items
+from Storage_module import BackgroundWriter, CsvExpenseStore
+from Visualization_module import ExpenseDashboard, LedgerModel, get_expenses_data
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAVE_TIMEOUT_SECONDS = 30
+# 明細表格一頁的列數 (VirtualTable 只組出可視範圍內的列)
+PAGE_ROWS = 50
+# --compare 只比較這些單位的指標 (數值越大越差)
+COMPARED_SUFFIXES = ('_ms', '_mb')
+# 差距小於此值 (毫秒或 MB) 時視為量測雜訊
+MIN_DELTA = 0.5
+
+
+def median_ms(samples):
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def percentile_ms(samples, q):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+
+# --- load ---
+
+def bench_load(path, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        model = LedgerModel(path, 'csv')
+        start = time.perf_counter()
+        totals, _ = get_expenses_data(model)
+        samples.append(time.perf_counter() - start)
+
+    # 尖峰記憶體另外量一次：tracemalloc 會拖慢解析，不能和計時混在一起
+    model = LedgerModel(path, 'csv')
+    tracemalloc.start()
+    get_expenses_data(model)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'parse_aggregate_ms': median_ms(samples),
+        'rows_per_s': round(rows / statistics.median(samples)),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'categories': len(totals),
+    }, model
+
+
+# --- render ---
+
+def bench_render(model, repeat):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    dashboard = ExpenseDashboard(model, fig)
+    timings = {'show_ledger': [], 'full': [], 'update': [], 'draw': []}
+    try:
+        for _ in range(repeat):
+            # show_ledger = 排名 + 明細修補 + 圓餅圖 + draw_idle (Agg 上會立即渲染)
+            start = time.perf_counter()
+            dashboard.show_ledger()
+            timings['show_ledger'].append(time.perf_counter() - start)
+            for mode in ('full', 'update'):
+                if mode == 'full':
+                    dashboard.pie.key = None  # 讓 PieChart 清空重建
+                start = time.perf_counter()
+                dashboard.draw_chart()
+                timings[mode].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            fig.canvas.draw()
+            timings['draw'].append(time.perf_counter() - start)
+    finally:
+        dashboard.close()
+    return {
+        'show_ledger_ms': median_ms(timings['show_ledger']),
+        'draw_chart_full_ms': median_ms(timings['full']),
+        'draw_chart_update_ms': median_ms(timings['update']),
+        'canvas_draw_ms': median_ms(timings['draw']),
+    }
+
+
+# --- table ---
+
+def has_display():
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+        return True
+    except tk.TclError:
+        return False
+
+
+def bench_table(model, repeat, display):
+    category = max(model.category_data, key=lambda c: len(model.category_data[c]))
+    start = time.perf_counter()
+    items = sort_items(model.category_data[category])
+    items[:PAGE_ROWS]
+    first_page = time.perf_counter() - start
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sort_items(model.category_data[category])[:PAGE_ROWS]
+        samples.append(time.perf_counter() - start)
+    result = {'rows': len(items), 'first_page_ms': round(first_page * 1000, 3),
+              'page_ms': median_ms(samples), 'build_ms': None}
+
+    if display:
+        import tkinter as tk
+        from Table_module import VirtualTable
+        samples = []
+        for _ in range(repeat):
+            root = tk.Tk()
+            root.withdraw()
+            start = time.perf_counter()
+            VirtualTable(root).set_items(items)
+            root.update_idletasks()
+            samples.append(time.perf_counter() - start)
+            root.destroy()
+        result['build_ms'] = median_ms(samples)
+    return result
+
+
+# --- save ---
+
+class _Entry:
+    """代替 tk.Entry 的輸入框 (只實作 save_expense 用到的方法)。"""
+
+    def __init__(self, text=''):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def delete(self, first, last=None):
+        self.text = ''
+
+    def insert(self, index, text):
+        self.text += text
+
+
+class HeadlessApp(ExpenseApp):
+    """
+    不建立 Tk 視窗的 ExpenseApp：輸入框以 _Entry 代替，save_expense / 驗證 / 背景寫入都是原本的程式碼；
+    寫入完成的回呼 (原本交給主執行緒輪詢後顯示訊息) 改為在寫入執行緒直接記錄完成時間。
+    """
+
+    def __init__(self, store):
+        self.master = self
+        self.store = store
+        self.writer = BackgroundWriter(store)
+        self._saves_pending = 0
+        self._save_poll = None
+        self.closing = False
+        self.date_entry, self.amount_entry = _Entry(), _Entry()
+        self.category_entry, self.notes_entry = _Entry(), _Entry()
+        self.saved = threading.Event()
+        self.error = None
+
+    def after(self, ms, func, *args):
+        """沒有事件迴圈：不排程輪詢 (結果由 _on_saved 直接記錄)。"""
+
+    def _on_saved(self, fields, error):
+        self._report_saved(fields, error)
+
+    def show_custom_error(self, title, message):
+        raise RuntimeError(f"{title}: {message}")
+
+    def _report_saved(self, fields, error):
+        self.error = error
+        self.saved.set()
+
+
+def bench_save(path, saves, durability):
+    app = HeadlessApp(CsvExpenseStore(path, durability=durability))
+    ui, durable = [], []
+    try:
+        for i in range(saves):
+            app.date_entry.text = '2024-05-01'
+            app.amount_entry.text = str(100 + i)
+            app.category_entry.text = '食物'
+            app.notes_entry.text = '午餐'
+            app.saved.clear()
+            start = time.perf_counter()
+            app.save_expense()
+            ui.append(time.perf_counter() - start)
+            if not app.saved.wait(SAVE_TIMEOUT_SECONDS):
+                raise RuntimeError("寫入逾時")
+            durable.append(time.perf_counter() - start)
+            if app.error is not None:
+                raise app.error
+    finally:
+        app.writer.close()
+    return {
+        'durability': durability,
+        'ui_p50_ms': percentile_ms(ui, 0.5),
+        'ui_p95_ms': percentile_ms(ui, 0.95),
+        'durable_p50_ms': percentile_ms(durable, 0.5),
+        'durable_p95_ms': percentile_ms(durable, 0.95),
+    }
+
+
+# --- 執行與比較 ---
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def run_case(tmp, rows, categories, note_length, args, display):
+    path = synth.write_ledger(os.path.join(tmp, 'expenses.csv'), rows,
+                              categories=categories, note_length=note_length)
+    result = {'rows': rows, 'categories': categories, 'note_length': note_length,
+              'file_mb': round(os.path.getsize(path) / 1024 / 1024, 2)}
+    result['load'], model = bench_load(path, rows, args.repeat)
+    result['render'] = bench_render(model, args.repeat)
+    result['table'] = bench_table(model, args.repeat, display)
+    result['save'] = bench_save(path, args.saves, args.durability)
+    os.remove(path)
+    return result
+
+
+def case_key(result):
+    return (result['rows'], result['categories'], result['note_length'])
+
+
+def compare(results, baseline, threshold):
+    """回傳變慢超過 threshold 的指標 [(case, metric, old, new)]。"""
+    old_cases = {case_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = old_cases.get(case_key(result))
+        if old is None:
+            continue
+        for section in ('load', 'render', 'table', 'save'):
+            for metric, value in result[section].items():
+                previous = old.get(section, {}).get(metric)
+                if (metric.endswith(COMPARED_SUFFIXES) and isinstance(value, (int, float))
+                        and isinstance(previous, (int, float)) and previous > 0
+                        and value > previous * (1 + threshold) and value - previous > MIN_DELTA):
+                    regressions.append((case_key(result), f'{section}.{metric}', previous, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--categories', type=int, nargs='+', default=[9])
+    parser.add_argument('--note-length', type=int, nargs='+', default=[12])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--saves', type=int, default=50)
+    parser.add_argument('--durability', default='fsync', choices=('none', 'fsync', 'full'))
+    parser.add_argument('--json', help='結果輸出路徑 (預設印到 stdout)')
+    parser.add_argument('--compare', help='與先前的 JSON 結果比較')
+    parser.add_argument('--threshold', type=float, default=0.2, help='視為回歸的變慢比例 (預設 20%%)')
+    args = parser.parse_args()
+    # 缺少中文字型時 matplotlib 會對每個字發出警告，量測時略過
+    warnings.filterwarnings('ignore')
+
+    display = has_display()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            for categories in args.categories:
+                for note_length in args.note_length:
+                    result = run_case(tmp, rows, categories, note_length, args, display)
+                    results.append(result)
+                    print(f"{rows:>10,} rows {categories:>5} cats  load {result['load']['parse_aggregate_ms']:>9.1f} ms "
+                          f"{result['load']['peak_mb']:>7.1f} MB  render {result['render']['show_ledger_ms']:>6.1f} ms  "
+                          f"table {result['table']['first_page_ms']:>7.1f} ms  save p95 {result['save']['durable_p95_ms']:>6.2f} ms",
+                          file=sys.stderr)
+
+    report = {'environment': environment(), 'display': display, 'results': results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for case, metric, old, new in regressions:
+            print(f"回歸 {case}: {metric} {old} -> {new}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
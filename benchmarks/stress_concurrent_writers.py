@@ -0,0 +1,101 @@
+"""
+多寫入者壓力測試：同時啟動多個寫入行程 (模擬多個 Input_module 視窗) 與一個讀取端，
+檢查最後帳本內的紀錄不多不少、沒有重複，而且讀取端在過程中看到的筆數只增不減。
+
+    python benchmarks/stress_concurrent_writers.py --writers 16 --records 500
+    python benchmarks/stress_concurrent_writers.py --backend columnar
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import synth
+from Storage_module import BACKEND_PATHS, open_ledger, open_store
+
+
+def write_records(backend, path, writer, records, start_at):
+    store = open_store(backend, path, durability='none')
+    rng = random.Random(writer)
+    # 所有寫入者在同一時間點開始，盡量製造競爭
+    time.sleep(max(0.0, start_at - time.time()))
+    written = 0
+    while written < records:
+        # 混合單筆儲存 (save_expense) 與小批次 (批次匯入)
+        batch = min(records - written, rng.choice((1, 1, 1, 5, 20)))
+        store.append_many([
+            {'date': '2024-05-01', 'amount': 1.0, 'category': synth.CATEGORIES[writer % len(synth.CATEGORIES)],
+             'notes': f'w{writer}-{written + i}'}
+            for i in range(batch)
+        ])
+        written += batch
+    if hasattr(store, 'close'):
+        store.close()
+
+
+def ledger_notes(ledger):
+    notes = []
+    for items in ledger.category_data.values():
+        notes.extend(item[2] for item in items)
+    return notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backend', choices=sorted(BACKEND_PATHS), default='csv')
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--records', type=int, default=500, help='每個寫入者寫入的筆數')
+    parser.add_argument('--child', nargs=4, metavar=('BACKEND', 'PATH', 'WRITER', 'START_AT'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        backend, path, writer, start_at = args.child
+        write_records(backend, path, int(writer), args.records, float(start_at))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, BACKEND_PATHS[args.backend])
+        open_store(args.backend, path).initialize()
+        start_at = time.time() + 1.0
+        extra = ['--records', str(args.records)]
+        procs = [subprocess.Popen([sys.executable, __file__, '--child', args.backend, path, str(i),
+                                   repr(start_at)] + extra)
+                 for i in range(args.writers)]
+
+        # 讀取端與寫入端同時執行：只讀取完整紀錄，筆數不可倒退
+        ledger = open_ledger(args.backend, path)
+        seen = refreshes = 0
+        regressions = 0
+        while any(p.poll() is None for p in procs):
+            if ledger.refresh() and ledger.valid:
+                count = len(ledger_notes(ledger))
+                regressions += count < seen
+                seen = max(seen, count)
+                refreshes += 1
+        failed = [p.returncode for p in procs if p.returncode]
+        elapsed = time.time() - start_at
+
+        ledger = open_ledger(args.backend, path)
+        ledger.refresh()
+        notes = ledger_notes(ledger)
+        expected = {f'w{w}-{i}' for w in range(args.writers) for i in range(args.records)}
+        lost = expected - set(notes)
+        duplicates = len(notes) - len(set(notes))
+        unexpected = set(notes) - expected
+
+        total = args.writers * args.records
+        print(f"backend={args.backend} writers={args.writers} records={total:,} "
+              f"({total / max(elapsed, 1e-9):,.0f} rows/sec, reader refreshes={refreshes})")
+        print(f"lost={len(lost)} duplicates={duplicates} corrupted={len(unexpected)} "
+              f"reader regressions={regressions} failed writers={len(failed)}")
+        if lost or duplicates or unexpected or regressions or failed:
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == '__main__':
+    main()
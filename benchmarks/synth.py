@@ -0,0 +1,97 @@
+"""
+合成帳本產生器 (Synthetic ledger generator)，供 benchmarks/ 下的腳本共用。
+可調整列數、類別數 (cardinality) 與備註平均長度 (中英混合，含逗號、引號與換行)：
+
+    python benchmarks/synth.py expenses.csv --rows 1000000 --categories 200 --note-length 40
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Storage_module import BOM, FIELDNAMES, encode_header, encode_records
+
+CATEGORIES = ['食物', '交通', '娛樂', '房租', '日用品', '醫療', '教育', '旅遊', '其他']
+NOTES = ['', '午餐', '捷運', 'coffee, large', '電影 "沙丘"', '超市採買\n含折扣']
+
+# 一次產生一個區塊再重複寫入，大帳本 (10M 列) 也能在數秒內產生
+_BLOCK_ROWS = 10_000
+# 產生備註用的字元：常用中文字、英數字與 CSV 需要跳脫的符號
+_CJK_CHARS = ('午餐晚餐早餐咖啡超市採買捷運公車高鐵計程車加油停車電影音樂會書店文具醫院藥局掛號'
+              '房租水費電費瓦斯網路手機學費補習旅遊住宿機票門票禮物聚餐宵夜飲料折扣退款分期')
+_ASCII_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789 '
+_SPECIAL_CHARS = ',"\n'
+
+
+def category_names(count):
+    """count 個類別名稱：先用常見類別，不夠時補上「類別0001」這類中文名稱。"""
+    names = CATEGORIES[:count]
+    names += [f'類別{i:04d}' for i in range(len(names), count)]
+    return names
+
+
+def make_notes(rng, count, mean_length):
+    """count 則隨機備註，長度在 [0, 2 * mean_length] 之間均勻分布；約七成為中文字。"""
+    notes = []
+    for _ in range(count):
+        chars = []
+        for _ in range(rng.randint(0, 2 * mean_length)):
+            roll = rng.random()
+            if roll < 0.7:
+                chars.append(rng.choice(_CJK_CHARS))
+            elif roll < 0.98:
+                chars.append(rng.choice(_ASCII_CHARS))
+            else:
+                chars.append(rng.choice(_SPECIAL_CHARS))
+        notes.append(''.join(chars))
+    return notes
+
+
+def make_records(rows, seed=0, categories=None, note_length=None):
+    """
+    產生 rows 筆隨機紀錄。categories 為類別數 (預設使用 CATEGORIES)，
+    note_length 為備註平均長度 (預設使用 NOTES 中的固定範例)。
+    """
+    rng = random.Random(seed)
+    names = CATEGORIES if categories is None else category_names(categories)
+    notes = NOTES if note_length is None else make_notes(rng, 512, note_length)
+    for _ in range(rows):
+        yield {
+            'date': f"{rng.randint(2015, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'amount': round(rng.uniform(1, 5000), 2),
+            'category': rng.choice(names),
+            'notes': rng.choice(notes),
+        }
+
+
+def write_ledger(path, rows, seed=0, categories=None, note_length=None):
+    """寫出一個含 BOM 與表頭、共 rows 列的 expenses.csv。"""
+    # 區塊至少要能涵蓋每個類別一次以上，否則重複的區塊會讓實際類別數變少
+    block_rows = max(_BLOCK_ROWS, 4 * (categories or 0))
+    options = {'seed': seed, 'categories': categories, 'note_length': note_length}
+    block = encode_records(make_records(min(rows, block_rows), **options), FIELDNAMES)
+    with open(path, 'wb') as f:
+        f.write(BOM + encode_header(FIELDNAMES))
+        for _ in range(rows // block_rows):
+            f.write(block)
+        if rows % block_rows:
+            f.write(encode_records(make_records(rows % block_rows, **options), FIELDNAMES))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='產生合成的 expenses.csv')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--categories', type=int, help='類別數 (預設 9 個常見類別)')
+    parser.add_argument('--note-length', type=int, help='備註平均長度 (字元)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_ledger(args.path, args.rows, args.seed, args.categories, args.note_length)
+    print(f"已寫出 {args.rows:,} 列到 {args.path} ({os.path.getsize(args.path) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
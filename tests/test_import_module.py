@@ -0,0 +1,136 @@
+"""
+批次匯入 (Import_module) 的驗證規則：含已知錯誤列的小型 CSV 匯入後，
+檢查寫進帳本的列與退件報告 (列號、原始欄位、錯誤原因) 是否正確，且與分塊大小無關。
+
+    python -m pytest tests
+"""
+import csv
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pandas as pd
+except ImportError:  # 批次匯入需要 pandas
+    pd = None
+
+if pd is not None:
+    from Import_module import ERRORS_COLUMN, ROW_COLUMN, import_file, validate_chunk
+    from Input_module import ERROR_AMOUNT_INVALID, ERROR_AMOUNT_NOT_POSITIVE, ERROR_CATEGORY_EMPTY, ERROR_DATE
+    from Storage_module import CsvExpenseStore
+
+SOURCE = '\ufeff' + '\r\n'.join([
+    'date,amount,category,notes',
+    '2024-05-01,120,food,lunch',
+    '2024-13-01,50,food,bad month',
+    '2024-05-02,abc,bus,',
+    '',
+    '2024-05-03,-5,bus,refund',
+    '2024-05-04,30,,no category',
+    'bad,0,,all wrong',
+    ' 2024-05-05 , 12.5 , snack ,"x, y"',
+    '2024-05-06,7,bus',
+]) + '\r\n'
+
+ACCEPTED = [
+    {'date': '2024-05-01', 'amount': '120.0', 'category': 'food', 'notes': 'lunch'},
+    {'date': '2024-05-05', 'amount': '12.5', 'category': 'snack', 'notes': 'x, y'},
+    {'date': '2024-05-06', 'amount': '7.0', 'category': 'bus', 'notes': ''},
+]
+
+
+@unittest.skipIf(pd is None, '批次匯入需要 pandas')
+class ImportFileTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.source = os.path.join(self.dir, 'bank.csv')
+        self.ledger = os.path.join(self.dir, 'expenses.csv')
+        self.rejects = os.path.join(self.dir, 'rejected.csv')
+
+    def write_source(self, text):
+        with open(self.source, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    def run_import(self, **kwargs):
+        store = CsvExpenseStore(self.ledger, durability='none')
+        result = import_file(self.source, store=store, rejects_path=self.rejects, **kwargs)
+        with open(self.ledger, encoding='utf_8_sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        with open(self.rejects, encoding='utf_8_sig', newline='') as f:
+            report = list(csv.reader(f))
+        return result, rows, report
+
+    def test_rejected_rows(self):
+        self.write_source(SOURCE)
+        (imported, rejected), rows, report = self.run_import()
+        self.assertEqual((imported, rejected), (3, 5))
+        self.assertEqual(rows, ACCEPTED)
+        # BOM 不會黏在第一個欄名上；列號為資料列的序號 (由 1 起算，不含表頭與空白列)，
+        # 錯誤原因依 validate_input 的順序以空白串接
+        self.assertEqual(report[0], [ROW_COLUMN, 'date', 'amount', 'category', 'notes', ERRORS_COLUMN])
+        self.assertEqual(report[1:], [
+            ['2', '2024-13-01', '50', 'food', 'bad month', ERROR_DATE],
+            ['3', '2024-05-02', 'abc', 'bus', '', ERROR_AMOUNT_INVALID],
+            ['4', '2024-05-03', '-5', 'bus', 'refund', ERROR_AMOUNT_NOT_POSITIVE],
+            ['5', '2024-05-04', '30', '', 'no category', ERROR_CATEGORY_EMPTY],
+            ['6', 'bad', '0', '', 'all wrong', ' '.join([ERROR_DATE, ERROR_AMOUNT_NOT_POSITIVE, ERROR_CATEGORY_EMPTY])],
+        ])
+
+    def test_chunk_boundaries(self):
+        self.write_source(SOURCE)
+        expected = self.run_import()
+        for chunk_rows in (1, 2, 3, 4):
+            os.remove(self.ledger)
+            with self.subTest(chunk_rows=chunk_rows):
+                self.assertEqual(self.run_import(chunk_rows=chunk_rows), expected)
+
+    def test_mapped_bank_statement(self):
+        # 沒有 BOM、欄名不同、以負數表示支出，類別欄位為空時使用預設類別
+        self.write_source('\n'.join([
+            '交易日期,支出金額,摘要,餘額,類別',
+            '2024/05/01,-100,轉帳,900,',
+            '2024/05/02,50,退款,950,',
+            '2024-05-03,-20,格式不同,930,',
+            '2024/05/04,-30,午餐,900,餐飲',
+        ]) + '\n')
+        (imported, rejected), rows, report = self.run_import(
+            columns={'date': '交易日期', 'amount': '支出金額', 'notes': '摘要', 'category': '類別'},
+            date_format='%Y/%m/%d', negate=True, default_category='銀行', chunk_rows=2)
+        self.assertEqual((imported, rejected), (2, 2))
+        self.assertEqual([(r['date'], r['amount'], r['category'], r['notes']) for r in rows],
+                         [('2024-05-01', '100.0', '銀行', '轉帳'), ('2024-05-04', '30.0', '餐飲', '午餐')])
+        self.assertEqual(report[0], [ROW_COLUMN, '交易日期', '支出金額', '摘要', '餘額', '類別', ERRORS_COLUMN])
+        self.assertEqual([(row[0], row[-1]) for row in report[1:]],
+                         [('2', ERROR_AMOUNT_NOT_POSITIVE), ('3', ERROR_DATE)])
+
+
+@unittest.skipIf(pd is None, '批次匯入需要 pandas')
+class ValidateChunkTest(unittest.TestCase):
+
+    def test_errors_follow_validate_input_order(self):
+        chunk = pd.DataFrame({
+            'date': ['2024-02-29', '2023-02-29', '', '2024-01-01'],
+            'amount': ['1.005', 'x', '-1', '0'],
+            'category': ['a', '', 'b', 'c'],
+            'notes': ['n', '', '', ''],
+        }, index=[10, 11, 12, 13])
+        accepted, errors = validate_chunk(chunk)
+        self.assertEqual(list(errors.index), [10, 11, 12, 13])
+        self.assertEqual(list(errors), [
+            '',
+            '\n'.join([ERROR_DATE, ERROR_AMOUNT_INVALID, ERROR_CATEGORY_EMPTY]),
+            '\n'.join([ERROR_DATE, ERROR_AMOUNT_NOT_POSITIVE]),
+            ERROR_AMOUNT_NOT_POSITIVE,
+        ])
+        self.assertEqual(accepted.to_dict('records'),
+                         [{'date': '2024-02-29', 'amount': round(1.005, 2), 'category': 'a', 'notes': 'n'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
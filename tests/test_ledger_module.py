@@ -0,0 +1,274 @@
+"""
+LedgerAggregator 與原本 csv.DictReader 彙總 (get_expenses_data 的舊版做法) 的比對：
+類別總計 (含首次出現的順序)、每個類別的明細與略過無效列的規則都必須相同。
+
+    python -m pytest tests
+"""
+import csv
+import io
+import mmap
+import os
+import random
+import sys
+import tempfile
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Ledger_module
+from Ledger_module import (DateRangeIndex, LedgerAggregator, month_key, record_boundary, sort_items,
+                           split_range, split_records)
+
+HEADER = 'date,amount,category,notes\n'
+
+
+def dict_reader_totals(path):
+    """原本的彙總方式：整份檔案交給 csv.DictReader，任何欄位錯誤的列都略過。"""
+    category_totals = defaultdict(float)
+    category_data = defaultdict(list)
+    with open(path, encoding='utf_8_sig', newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                row_lower = {k.lower(): v for k, v in row.items()}
+                amt = float(row_lower['amount'])
+                cat = row_lower['category']
+                if cat:
+                    category_totals[cat] += amt
+                    category_data[cat].append((row_lower['date'], amt, row_lower.get('notes', '')))
+            except Exception:
+                continue
+    return category_totals, category_data
+
+
+class LedgerParsingTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'expenses.csv')
+
+    def write(self, text, mode='w'):
+        with open(self.path, mode, encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    def assertMatchesDictReader(self, ledger):
+        totals, details = dict_reader_totals(self.path)
+        self.assertEqual(list(ledger.category_totals.items()), list(totals.items()))
+        self.assertEqual({c: list(ledger.category_data[c]) for c in ledger.category_data},
+                         {c: sort_items(rows) for c, rows in details.items()})
+
+    def load(self):
+        ledger = LedgerAggregator(self.path)
+        ledger.refresh()
+        self.assertMatchesDictReader(ledger)
+        return ledger
+
+    def test_quote_inside_unquoted_field(self):
+        self.write(HEADER + '2024-01-01,5,food,5" screen\n2024-01-02,16,bus,\n')
+        ledger = self.load()
+        self.assertEqual(dict(ledger.category_totals), {'food': 5.0, 'bus': 16.0})
+
+        # 之後追加的列也要讀到 (引號不能讓紀錄邊界從此失準)
+        self.write('2024-01-03,7,food,"午餐\n含飲料"\n2024-01-04,2,bus,2" x\n', 'a')
+        self.assertTrue(ledger.refresh())
+        self.assertMatchesDictReader(ledger)
+        self.assertEqual(ledger.category_totals['food'], 12.0)
+
+    def test_last_row_without_newline(self):
+        self.write(HEADER + '2024-01-01,5,food,a\n2024-01-02,3,bus,b')
+        ledger = self.load()
+        self.assertEqual(ledger.category_totals['bus'], 3.0)
+
+        # CsvExpenseStore 追加時先補上換行
+        self.write('\n2024-01-03,4,bus,c\n', 'a')
+        self.assertTrue(ledger.refresh())
+        self.assertMatchesDictReader(ledger)
+        self.assertEqual(ledger.category_totals['bus'], 7.0)
+
+    def test_unclosed_quote_at_end_of_file(self):
+        self.write(HEADER + '2024-01-01,5,food,a\n2024-01-02,3,bus,"no closing\nquote')
+        self.load()
+
+    def test_malformed_rows(self):
+        self.write('\ufeff' + HEADER + '\n'.join([
+            '2024-01-01,abc,food,bad amount',
+            '2024-01-01,1,,no category',
+            '2024-01-01,2,food,too,many,fields',
+            '2024-01-01,3,food',
+            '',
+            '"2024-01-02",4,"fo""od","x"y,z"',
+            'bad date,5,food,"a,b"',
+            '2024-01-03,6,bus,"a""b"" ""c"""',
+            ',7,bus,"""quoted"" start"',
+        ]) + '\n')
+        self.load()
+
+    def test_block_boundaries(self):
+        # 區塊很小時每一筆多行備註都可能被切開
+        rows = [f'2024-01-{i % 28 + 1:02d},{i}.1,cat{i % 5},' + ('"a\n""b"",\nc"' if i % 3 else f'{i}" x')
+                for i in range(300)]
+        self.write(HEADER + '\n'.join(rows) + '\n')
+        with mock.patch.object(Ledger_module, 'READ_CHUNK_SIZE', 7):
+            self.load()
+
+    def test_parallel_load(self):
+        rows = [f'2024-02-{i % 28 + 1:02d},{i * 0.1},cat{i % 7},' + ('"a\n""b""\n"' if i % 4 else f'{i}" x')
+                for i in range(2000)]
+        self.write(HEADER + '\n'.join(rows))
+        with mock.patch.multiple(Ledger_module, PARALLEL_LOAD_BYTES=0, LOAD_WORKERS=3):
+            ledger = self.load()
+        sequential = LedgerAggregator(self.path)
+        sequential.refresh()
+        self.assertEqual(ledger.date_index.days, sequential.date_index.days)
+
+
+class SplitRecordsTest(unittest.TestCase):
+
+    def test_quoted_field_across_count_window(self):
+        # 每筆都有跨好幾行的引號欄位，計數視窗 (READ_CHUNK_SIZE) 很小時引號欄位一定會跨過視窗邊界
+        data = HEADER.encode() + b''.join(
+            f'2024-01-01,{i},cat,"line\n""{i}""\n\nend"\n'.encode() for i in range(200))
+        start = len(HEADER)
+        with tempfile.TemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                with mock.patch.object(Ledger_module, 'READ_CHUNK_SIZE', 5):
+                    bounds = split_records(view, start, len(data), 4)
+        self.assertEqual(bounds, split_records(data, start, len(data), 4))
+        self.assertEqual(len(bounds), 5)
+        rows = list(csv.reader(io.StringIO(data[start:].decode(), newline='')))
+        for bound in bounds[1:-1]:
+            # 每個切點都是紀錄邊界：前後兩段分開解析的結果與整段相同
+            head = list(csv.reader(io.StringIO(data[start:bound].decode(), newline='')))
+            tail = list(csv.reader(io.StringIO(data[bound:].decode(), newline='')))
+            self.assertEqual(head + tail, rows)
+
+
+class RecordBoundaryTest(unittest.TestCase):
+
+    def test_matches_csv_reader(self):
+        cases = [
+            (b'a,b\nc,"d\ne"\nf', 12),
+            (b'a,5" x\nb,c\n', 11),
+            (b'a,"x""\ny"\nb', 10),
+            (b'"a\nb",c\nd,"e\n', 8),
+            (b'a,"b\n', 0),
+            (b'a,"b""\n', 0),
+            (b'x"\n"y', 3),
+        ]
+        for data, expected in cases:
+            with self.subTest(data=data):
+                self.assertEqual(record_boundary(data), expected)
+
+
+def days_between(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def month_days(key):
+    first = date(key // 12, key % 12 + 1, 1)
+    return days_between(first, date(first.year + (first.month == 12), first.month % 12 + 1, 1) - timedelta(days=1))
+
+
+# 月底、閏年 (含 2000 與 2100 這兩個世紀年)、跨年的日期；每一對 (start, end) 都會檢查
+EDGE_DAYS = [date(2023, 12, 31), date(2024, 1, 1), date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 28),
+             date(2024, 2, 29), date(2024, 3, 1), date(2024, 12, 31), date(2025, 1, 1), date(2025, 2, 28),
+             date(2025, 3, 1), date(2000, 2, 29), date(2100, 2, 28), date(2100, 3, 1)]
+
+
+class SplitRangeTest(unittest.TestCase):
+
+    def assertCovers(self, start, end):
+        days, months = split_range(start, end)
+        covered = [day for first, last in days for day in days_between(first, last)]
+        if months is not None:
+            self.assertLessEqual(months[0], months[1])
+            covered += [day for key in range(months[0], months[1] + 1) for day in month_days(key)]
+        # 零散日期與完整月份不重疊，合起來剛好是 [start, end] 的每一天
+        self.assertEqual(sorted(covered), days_between(start, end) if start <= end else [])
+        # 完整月份都交給月份桶：零散的日期區間不能包含任何一整個月
+        for first, last in days:
+            for key in range(month_key(first), month_key(last) + 1):
+                month = month_days(key)
+                self.assertFalse(first <= month[0] and month[-1] <= last, (first, last))
+
+    def test_edge_days(self):
+        for start in EDGE_DAYS:
+            for end in EDGE_DAYS:
+                with self.subTest(start=start, end=end):
+                    self.assertCovers(start, end)
+
+    def test_whole_months(self):
+        self.assertEqual(split_range(date(2024, 2, 1), date(2024, 2, 29)), ([], (month_key(date(2024, 2, 1)),) * 2))
+        self.assertEqual(split_range(date(2024, 12, 1), date(2025, 1, 31)),
+                         ([], (month_key(date(2024, 12, 1)), month_key(date(2025, 1, 1)))))
+        self.assertEqual(split_range(date(2023, 2, 1), date(2023, 2, 28))[1], (month_key(date(2023, 2, 1)),) * 2)
+        self.assertEqual(split_range(date(2024, 2, 1), date(2024, 2, 28)), ([(date(2024, 2, 1), date(2024, 2, 28))], None))
+
+    def test_empty_and_inverted(self):
+        self.assertEqual(split_range(date(2024, 3, 2), date(2024, 3, 1)), ([], None))
+        self.assertEqual(split_range(date(2024, 3, 1), date(2024, 3, 1)), ([(date(2024, 3, 1), date(2024, 3, 1))], None))
+
+    def test_random_ranges(self):
+        rng = random.Random(7)
+        base = date(2023, 11, 1)
+        for _ in range(2000):
+            start = base + timedelta(days=rng.randrange(600))
+            self.assertCovers(start, start + timedelta(days=rng.randrange(-5, 200)))
+
+
+class DateRangeIndexTest(unittest.TestCase):
+    """DateRangeIndex.add / query 與逐列篩選加總 (暴力法) 的比較；金額都是 0.25 的倍數，加總順序不影響結果。"""
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.rows = []
+        days = days_between(date(2023, 12, 20), date(2024, 3, 10)) + [date(2000, 2, 29), date(2100, 3, 1)]
+        for _ in range(3000):
+            day = rng.choice(days)
+            # 同一天也會以不同的寫法出現 (YYYY/MM/DD 與 YYYY-MM-DD 是同一天)；無法解析的日期不計入任何區間
+            text = rng.choice([day.isoformat(), day.isoformat(), day.strftime('%Y/%m/%d'), 'bad date', ''])
+            self.rows.append((text, rng.choice('abcd'), rng.randrange(1, 400) / 4))
+
+    def brute_force(self, rows, start, end):
+        totals = defaultdict(float)
+        for text, category, amount in rows:
+            ordinal = Ledger_module.date_to_ordinal(text)
+            if ordinal and (start is None or start.toordinal() <= ordinal) and (end is None or ordinal <= end.toordinal()):
+                totals[category] += amount
+        return dict(totals)
+
+    def ranges(self):
+        yield None, None
+        yield date(2024, 2, 1), None
+        yield None, date(2024, 1, 31)
+        yield date(2024, 3, 1), date(2024, 2, 29)   # 區間顛倒
+        yield date(2025, 1, 1), date(2025, 12, 31)  # 沒有資料
+        yield date(1999, 1, 1), date(2200, 1, 1)    # 超出資料範圍
+        for start in EDGE_DAYS:
+            for end in EDGE_DAYS:
+                yield start, end
+
+    def test_matches_brute_force(self):
+        index = DateRangeIndex()
+        done = 0
+        # 分批加入，中間穿插查詢：已彙總過的月份被新的列弄髒後必須重新彙總
+        for stop in (500, 501, 2000, len(self.rows)):
+            for text, category, amount in self.rows[done:stop]:
+                index.add(text, category, amount)
+            done = stop
+            for start, end in self.ranges():
+                with self.subTest(rows=stop, start=start, end=end):
+                    self.assertEqual(dict(index.query(start, end)), self.brute_force(self.rows[:stop], start, end))
+
+    def test_empty_index(self):
+        self.assertEqual(dict(DateRangeIndex().query(date(2024, 1, 1), date(2024, 12, 31))), {})
+        self.assertEqual(dict(DateRangeIndex().query()), {})
+
+
+if __name__ == '__main__':
+    unittest.main()